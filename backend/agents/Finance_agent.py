@@ -1,20 +1,20 @@
 import numpy as np
 from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore
+from services.storage import get_client
 
-# Firebase init
-cred = credentials.Certificate("firebase-key.json")
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
+db = get_client()
 
 # Financial Portfolio Agent
 import re
-import firebase_admin
-from firebase_admin import credentials, firestore
-from services.gemini_service import call_gemini
+from services.gemini_service import call_gemini, call_gemini_async
+from services.firestore_service import get_user_doc
+from services.firestore_async_service import (
+    get_user_doc_async,
+    user_ref as async_user_ref,
+)
+
+# Onboarding profile rarely changes
+PORTFOLIO_CACHE_TTL = 24 * 60 * 60
 
 
 class FinancialPortfolioAgent:
@@ -23,10 +23,24 @@ class FinancialPortfolioAgent:
         self.user_ref = db.collection("users").document(user_id)
 
     def get_user_profile(self):
-        return self.user_ref.get().to_dict() or {}
+        return get_user_doc(self.user_id) or {}
 
     def generate_portfolio(self):
-        profile = self.get_user_profile()
+        prompt = self._prompt(self.get_user_profile())
+        ai_text = call_gemini(prompt, cache_ttl=PORTFOLIO_CACHE_TTL)
+        return self._finish(ai_text)
+
+    async def agenerate_portfolio(self):
+        profile = await get_user_doc_async(self.user_id) or {}
+        ai_text = await call_gemini_async(
+            self._prompt(profile), cache_ttl=PORTFOLIO_CACHE_TTL
+        )
+        result = self._result(ai_text)
+        allocation = async_user_ref(self.user_id).collection("portfolio")
+        await allocation.document("allocation").set(result)
+        return result
+
+    def _prompt(self, profile):
         # Collect all onboarding fields
         age = profile.get("age", "")
         sex = profile.get("sex", "")
@@ -39,7 +53,7 @@ class FinancialPortfolioAgent:
         healthConditions = profile.get("healthConditions", "")
         investmentAmount = profile.get("investmentAmount", "")
 
-        prompt = (
+        return (
             f"Age: {age}, Sex: {sex}, Income (INR): {income}, "
             f"Income after Tax: {incomeAfterTax}, Marriage Status: {marriageStatus}, "
             f"Number of Kids: {numOfKids}, Age of Parents: {ageOfParents}, "
@@ -53,12 +67,15 @@ class FinancialPortfolioAgent:
             f"Be VERY concise. No disclaimers. Bullet points only. "
         )
 
-        ai_text = call_gemini(prompt)
+    def _result(self, ai_text):
         cleaned_response = re.sub(r"\*+", "", ai_text)
 
-        result = {
+        return {
             "portfolio": cleaned_response,
             "updatedAt": datetime.utcnow().isoformat(),
         }
+
+    def _finish(self, ai_text):
+        result = self._result(ai_text)
         self.user_ref.collection("portfolio").document("allocation").set(result)
         return result
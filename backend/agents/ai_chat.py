@@ -1,28 +1,248 @@
 # agents/finance_chatbot_agent.py
 
+import asyncio
+import threading
+import time
+from datetime import datetime
 from services.firestore_service import (
+    CHAT_HISTORY_WINDOW,
+    reply_timestamp,
     save_chat_message,
-    get_chat_history,
+    get_recent_chat_history,
     get_onboarding_fields,
+    get_chat_memory,
+    get_chat_messages_after,
+    save_chat_memory,
 )
-from services.gemini_service import call_gemini
+from services.firestore_async_service import (
+    save_chat_message_async,
+    get_recent_chat_history_async,
+    get_onboarding_fields_async,
+    get_chat_memory_async,
+)
+from services.request_loader import load_many
+from services.gemini_service import (
+    call_gemini,
+    call_gemini_async,
+    generate,
+    stream_gemini_async,
+)
+
+# Prompt memory = rolling summary + the messages it doesn't cover yet.
+# Once RECENT + EVERY messages are uncovered, all but the last RECENT are
+# folded into the summary, so prompt size stays bounded.
+CHAT_RECENT_MESSAGES = 4
+CHAT_SUMMARY_EVERY = 6
+# Cap per refresh; a longer backlog is folded over the next turns
+CHAT_SUMMARY_MAX_FOLD = 50
+
+_summaries_running = set()
+_summaries_lock = threading.Lock()
+
+
+def refresh_chat_summary(user_id: str):
+    """
+    Fold every stored message after the summary's coveredUntil, except the
+    last CHAT_RECENT_MESSAGES, into the user's running summary (one Gemini
+    call). Reading from storage rather than the recent window means turns
+    a failed or skipped refresh left out are picked up by the next one.
+    At most one refresh per user runs at a time.
+    """
+    with _summaries_lock:
+        if user_id in _summaries_running:
+            return
+        _summaries_running.add(user_id)
+
+    try:
+        memory = get_chat_memory(user_id)
+        summary = memory.get("summary")
+        uncovered = get_chat_messages_after(
+            user_id,
+            memory.get("coveredUntil"),
+            CHAT_SUMMARY_MAX_FOLD + CHAT_RECENT_MESSAGES,
+        )
+        messages = uncovered[:-CHAT_RECENT_MESSAGES]
+        if not messages:
+            return
+
+        transcript = "\n".join(f"{m['role']}: {m['message']}" for m in messages)
+        prompt = f"""
+You maintain the memory of a personal finance chatbot for an Indian gig worker.
+
+CURRENT SUMMARY:
+{summary or "(empty)"}
+
+NEW MESSAGES:
+{transcript}
+
+TASK:
+Rewrite the summary to include the new messages.
+- Max 120 words, plain sentences.
+- Keep the user's goals, numbers, decisions, preferences and open questions.
+- Drop greetings and small talk.
+"""
+        text = getattr(generate(prompt), "text", None)
+        if text and text.strip():
+            save_chat_memory(user_id, text.strip(), messages[-1]["timestamp"])
+
+    except Exception as e:
+        print("Chat summary error:", e)
+
+    finally:
+        with _summaries_lock:
+            _summaries_running.discard(user_id)
 
 
 class chatbot:
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.onboarding = get_onboarding_fields(user_id)
-        self.history = get_chat_history(user_id)
+        self.onboarding, self.memory, self.history = load_many(
+            lambda: get_onboarding_fields(user_id),
+            lambda: get_chat_memory(user_id),
+            lambda: get_recent_chat_history(user_id, CHAT_HISTORY_WINDOW),
+        )
+
+    @classmethod
+    async def aload(cls, user_id: str):
+        """
+        Async constructor: the same three reads, gathered on the AsyncClient.
+        """
+        self = cls.__new__(cls)
+        self.user_id = user_id
+        self.onboarding, self.memory, self.history = await asyncio.gather(
+            get_onboarding_fields_async(user_id),
+            get_chat_memory_async(user_id),
+            get_recent_chat_history_async(user_id, CHAT_HISTORY_WINDOW),
+        )
+        return self
+
+    def _uncovered_history(self):
+        covered_until = self.memory.get("coveredUntil")
+        if covered_until is None:
+            return self.history
+        return [m for m in self.history if m["timestamp"] > covered_until]
+
+    def _chat_context(self):
+        summary = self.memory.get("summary")
+        recent = "\n".join(
+            f"{c['role']}: {c['message']}" for c in self._uncovered_history()
+        )
+        if not summary:
+            return f"RECENT CHAT:\n{recent}"
+        return f"CONVERSATION SUMMARY:\n{summary}\n\nRECENT CHAT:\n{recent}"
+
+    def _maybe_summarize(self):
+        """
+        Fold older uncovered messages into the summary in the background,
+        once enough have piled up (the window read at load time plus the
+        turn just saved).
+        """
+        uncovered = self._uncovered_history()
+        if len(uncovered) + 2 < CHAT_RECENT_MESSAGES + CHAT_SUMMARY_EVERY:
+            return
+
+        threading.Thread(
+            target=refresh_chat_summary, args=(self.user_id,), daemon=True
+        ).start()
 
     def chat(self, user_message: str):
+        asked_at = datetime.utcnow()
+
+        def save_question():
+            save_chat_message(self.user_id, "user", user_message, asked_at)
+
+        prompt, result = self._plan_reply(user_message)
+        if prompt is None:
+            save_question()
+        else:
+            # The user message is written while Gemini answers, and is kept
+            # even if the call fails
+            _, result["reply"] = load_many(save_question, lambda: call_gemini(prompt))
+
+        save_chat_message(
+            self.user_id, "assistant", result["reply"], reply_timestamp(asked_at)
+        )
+        self._maybe_summarize()
+        return result
+
+    async def achat(self, user_message: str):
+        asked_at = datetime.utcnow()
+
+        prompt, result = self._plan_reply(user_message)
+        user_write = asyncio.create_task(
+            save_chat_message_async(self.user_id, "user", user_message, asked_at)
+        )
+        try:
+            if prompt is not None:
+                result["reply"] = await call_gemini_async(prompt)
+        finally:
+            await user_write
+
+        await save_chat_message_async(
+            self.user_id, "assistant", result["reply"], reply_timestamp(asked_at)
+        )
+        self._maybe_summarize()
+        return result
 
-        # Save user message
-        save_chat_message(self.user_id, "user", user_message)
+    async def achat_stream(self, user_message: str):
+        """
+        Async generator of ("token", text) events as Gemini streams the
+        reply, then one ("done", result) event. The user message is saved
+        while the reply streams (even if the client disconnects or Gemini
+        fails); the assistant message once the full reply is assembled.
+        """
+        started = time.perf_counter()
+        asked_at = datetime.utcnow()
 
-        # Recent chat context (last 10 messages)
-        last_messages = "\n".join(
-            [f"{c['role']}: {c['message']}" for c in self.history[-10:]]
+        prompt, result = self._plan_reply(user_message)
+        user_write = asyncio.create_task(
+            save_chat_message_async(self.user_id, "user", user_message, asked_at)
         )
+        first_token_at = None
+        chunks = []
+
+        try:
+            if prompt is None:
+                first_token_at = time.perf_counter()
+                chunks.append(result["reply"])
+                yield "token", result["reply"]
+            else:
+                async for text in stream_gemini_async(prompt):
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    chunks.append(text)
+                    yield "token", text
+        finally:
+            # Shielded: a disconnect cancelling this generator must not
+            # cancel the write too
+            await asyncio.shield(user_write)
+
+        result["reply"] = "".join(chunks).strip() or "No response generated."
+        await save_chat_message_async(
+            self.user_id, "assistant", result["reply"], reply_timestamp(asked_at)
+        )
+        self._maybe_summarize()
+
+        ttft_ms = (
+            round((first_token_at - started) * 1000, 1) if first_token_at else None
+        )
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        print(f"Chat stream {self.user_id}: ttft={ttft_ms}ms total={total_ms}ms")
+
+        result["metrics"] = {
+            "timeToFirstTokenMs": ttft_ms,
+            "totalMs": total_ms,
+            "chunks": len(chunks),
+        }
+        yield "done", result
+
+    def _plan_reply(self, user_message: str):
+        """
+        Returns (prompt, result). `prompt` is None when the reply is canned
+        and already in result["reply"]; otherwise Gemini fills it in.
+        """
+        # Rolling summary + recent messages it doesn't cover yet
+        chat_context = self._chat_context()
 
         # Extract fields safely
         income = self.onboarding.get("monthlyIncome")
@@ -50,8 +270,7 @@ class chatbot:
                 "I help you understand money, savings, and investments in simple language. "
                 "Ask me anything—budgeting, SIPs, stocks, taxes, or goals!"
             )
-            save_chat_message(self.user_id, "assistant", reply)
-            return {"reply": reply, "intro": True, "userId": self.user_id}
+            return None, {"reply": reply, "intro": True, "userId": self.user_id}
 
         # ===========================================================
         # SPECIAL CASE 2: Profile incomplete → give simple response
@@ -69,16 +288,12 @@ RULES:
 USER MESSAGE:
 "{user_message}"
 
-RECENT CHAT:
-{last_messages}
+{chat_context}
 
 Write in simple English, friendly tone.
 """
-            response = call_gemini(prompt)
-            save_chat_message(self.user_id, "assistant", response)
-
-            return {
-                "reply": response,
+            return prompt, {
+                "reply": None,
                 "profile_complete": False,
                 "userId": self.user_id,
             }
@@ -106,8 +321,7 @@ Gig Type: {self.onboarding.get('gigType')}
 USER QUESTION:
 "{user_message}"
 
-RECENT CHAT:
-{last_messages}
+{chat_context}
 
 FORMAT:
 1–2 lines: Answer doubt clearly  
@@ -116,12 +330,8 @@ Up to 3 lines: Short portfolio IF user asked about investing
 
 Write human-friendly, very simple.
 """
-        response = call_gemini(prompt)
-
-        save_chat_message(self.user_id, "assistant", response)
-
-        return {
-            "reply": response,
+        return prompt, {
+            "reply": None,
             "profile_complete": True,
             "userId": self.user_id,
         }
@@ -1,16 +1,22 @@
-import numpy as np
+import asyncio
+import hashlib
+import json
 from datetime import datetime
-from services.firestore_service import get_user_transactions
-from services.gemini_service import call_gemini
-import firebase_admin
-from firebase_admin import credentials, firestore
+from services.firestore_service import get_month_frame, get_user_doc
+from services.firestore_async_service import (
+    adb,
+    get_month_frame_async,
+    get_user_doc_async,
+    user_ref as async_user_ref,
+)
+from services.request_loader import load_many
+from services.gemini_service import call_gemini, call_gemini_async
+from services.storage import async_transactional, get_client, transactional
 
-# Firebase init
-cred = credentials.Certificate("firebase-key.json")
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
+db = get_client()
 
-db = firestore.client()
+# Tips only change when this month's numbers do
+CASHFLOW_TIPS_CACHE_TTL = 60 * 60
 
 
 class CashflowPredictionService:
@@ -18,45 +24,112 @@ class CashflowPredictionService:
         self.user_id = user_id
         self.user_ref = db.collection("users").document(user_id)
 
+        self.prediction_ref = self.user_ref.collection("cashflow").document(
+            "prediction"
+        )
+        self.async_prediction_ref = (
+            async_user_ref(user_id).collection("cashflow").document("prediction")
+        )
+
     def get_user_profile(self):
-        return self.user_ref.get().to_dict() or {}
+        return get_user_doc(self.user_id) or {}
 
     def predict(self):
-        profile = self.get_user_profile()
-
-        base_income = float(profile.get("monthlyIncome", 0))  # onboarding income
-        base_expense = float(profile.get("monthlyExpense", 0))  # onboarding expense
-
-        logs = get_user_transactions(self.user_id)
+        return self.get_stored() or self.refresh()
+
+    async def apredict(self):
+        # Same flow as predict() on the AsyncClient: no worker threads
+        stored, profile = await asyncio.gather(
+            self.async_prediction_ref.get(),
+            get_user_doc_async(self.user_id),
+        )
+        stored, profile = stored.to_dict(), profile or {}
+        if self._is_valid(stored, profile):
+            return stored
 
         now = datetime.now()
-        cm = now.month
-        cy = now.year
+        month = await get_month_frame_async(self.user_id, now.year, now.month)
+        result, prompt = self._build(profile, month, now)
 
-        daily_incomes = []
-        daily_expenses = []
-        days_logged = 0
-
-        # ---------- READ REAL FIRESTORE DATE (doc.id) ----------
-        for log in logs:
-            date_str = log.get("__id__") or log.get("date")
-            if not date_str:
-                continue
-
-            try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-            except:
-                continue
-
-            # ---------- include ONLY current month's logs ----------
-            if dt.year == cy and dt.month == cm:
-                days_logged += 1
+        if self._same_inputs(stored, result):
+            result["aiTips"] = stored.get("aiTips", [])
+        else:
+            ai_text = await call_gemini_async(prompt, cache_ttl=CASHFLOW_TIPS_CACHE_TTL)
+            result["aiTips"] = self._tips(ai_text)
+
+        return await self._astore(result, stored)
+
+    def refresh(self):
+        """
+        Recompute from this month's logs; Gemini is only called when the
+        inputs actually changed. Runs after a transaction write.
+        """
+        # Read before the logs, so _store can tell if a save landed since
+        stored = self.prediction_ref.get().to_dict()
+        result, prompt = self._prepare()
+
+        if self._same_inputs(stored, result):
+            result["aiTips"] = stored.get("aiTips", [])
+        else:
+            ai_text = call_gemini(prompt, cache_ttl=CASHFLOW_TIPS_CACHE_TTL)
+            result["aiTips"] = self._tips(ai_text)
+
+        return self._store(result, stored)
+
+    # ----------------------------
+    # Stored prediction
+    # ----------------------------
+    @staticmethod
+    def _profile_key(profile):
+        income = float(profile.get("monthlyIncome", 0))
+        expense = float(profile.get("monthlyExpense", 0))
+        return f"{income}|{expense}"
+
+    def get_stored(self):
+        """
+        The stored prediction if still valid: not marked stale by a
+        transaction write, same month, same onboarding income/expense.
+        """
+        stored, profile = load_many(
+            lambda: self.prediction_ref.get().to_dict(),
+            self.get_user_profile,
+        )
+        return stored if self._is_valid(stored, profile) else None
+
+    def _is_valid(self, stored, profile):
+        inputs = (stored or {}).get("inputs") or {}
+        return bool(
+            stored
+            and not stored.get("stale")
+            and inputs.get("month") == datetime.now().strftime("%Y-%m")
+            and inputs.get("profile") == self._profile_key(profile)
+        )
+
+    @staticmethod
+    def _same_inputs(stored, result):
+        # Same fingerprint (e.g. only notes were edited): the old tips still fit
+        inputs = (stored or {}).get("inputs") or {}
+        return inputs.get("hash") == result["inputs"]["hash"]
+
+    def _prepare(self):
+        """
+        Everything before the Gemini call: returns (partial result, prompt).
+        """
+        # ---------- ONLY current month's logs (doc-ID range query) ----------
+        now = datetime.now()
+        profile, month = load_many(
+            self.get_user_profile,
+            lambda: get_month_frame(self.user_id, now.year, now.month),
+        )
+        return self._build(profile, month, now)
 
-                income = float(log.get("income", 0))
-                total_exp = sum(float(v or 0) for v in log.get("expenses", {}).values())
+    def _build(self, profile, month, now):
+        base_income = float(profile.get("monthlyIncome", 0))  # onboarding income
+        base_expense = float(profile.get("monthlyExpense", 0))  # onboarding expense
 
-                daily_incomes.append(income)
-                daily_expenses.append(total_exp)
+        days_logged = len(month)
+        avg_daily_income = month.avg_daily_income()
+        avg_daily_expense = month.avg_daily_spend()
 
         # ---------- If no logs this month → fallback to onboarding ----------
         if days_logged == 0:
@@ -65,9 +138,6 @@ class CashflowPredictionService:
 
         else:
             # ---------- project from actual logs ----------
-            avg_daily_income = np.mean(daily_incomes)
-            avg_daily_expense = np.mean(daily_expenses)
-
             projected_income_actual = avg_daily_income * 30
             projected_expense_actual = avg_daily_expense * 30
 
@@ -91,8 +161,8 @@ You are a financial coach for gig workers in India.
 User data:
 - Onboarding expected income: ₹{base_income}
 - Onboarding expected expense: ₹{base_expense}
-- Avg daily income this month: ₹{np.mean(daily_incomes) if days_logged else 0:.0f}
-- Avg daily expense this month: ₹{np.mean(daily_expenses) if days_logged else 0:.0f}
+- Avg daily income this month: ₹{avg_daily_income:.0f}
+- Avg daily expense this month: ₹{avg_daily_expense:.0f}
 - Projected monthly income based on actual logs: ₹{final_income:.0f}
 - Projected monthly expenses based on actual logs: ₹{final_expense:.0f}
 - Expected shortage (if any): ₹{shortage:.0f}
@@ -102,8 +172,13 @@ Give EXACTLY 3 short, sharp, actionable financial tips.
 Each tip must be ONE sentence. No bullets.
 """
 
-        ai_text = call_gemini(prompt)
-        tips = [t.strip() for t in ai_text.split("\n") if t.strip()][:3]
+        # Fingerprint of everything the prediction is computed from
+        fingerprint = json.dumps(
+            [
+                self._profile_key(profile),
+                month.daily(),
+            ]
+        )
 
         result = {
             "cashflowScore": int(score),
@@ -112,18 +187,61 @@ Each tip must be ONE sentence. No bullets.
                 "income": int(final_income),
                 "expense": int(final_expense),
             },
-            "aiTips": tips,
             "dailyStats": {
                 "daysLogged": days_logged,
-                "avgDailyIncome": (
-                    round(np.mean(daily_incomes), 2) if days_logged else 0
-                ),
-                "avgDailyExpense": (
-                    round(np.mean(daily_expenses), 2) if days_logged else 0
-                ),
+                "avgDailyIncome": round(avg_daily_income, 2),
+                "avgDailyExpense": round(avg_daily_expense, 2),
+            },
+            "inputs": {
+                "month": now.strftime("%Y-%m"),
+                "profile": self._profile_key(profile),
+                "hash": hashlib.sha1(fingerprint.encode("utf-8")).hexdigest(),
             },
-            "updatedAt": datetime.utcnow().isoformat(),
         }
 
-        self.user_ref.collection("cashflow").document("prediction").set(result)
+        return result, prompt
+
+    @staticmethod
+    def _tips(ai_text):
+        return [t.strip() for t in ai_text.split("\n") if t.strip()][:3]
+
+    @staticmethod
+    def _stamp(result):
+        result["updatedAt"] = datetime.utcnow().isoformat()
+        result["stale"] = False
+
+    @staticmethod
+    def _unchanged(read, current):
+        # save_transaction_log stamps staleAt on every save: if it moved since
+        # `read`, the logs this result was computed from are outdated
+        return (current or {}).get("staleAt") == (read or {}).get("staleAt")
+
+    def _store(self, result, read):
+        """
+        Write `result` unless a save landed after `read` was taken (it would
+        clear that save's stale flag with old numbers). The caller still gets
+        the result; the next request recomputes.
+        """
+        self._stamp(result)
+
+        @transactional
+        def write(transaction):
+            current = self.prediction_ref.get(transaction=transaction).to_dict()
+            if self._unchanged(read, current):
+                transaction.set(self.prediction_ref, result)
+
+        write(db.transaction())
+        return result
+
+    async def _astore(self, result, read):
+        self._stamp(result)
+        ref = self.async_prediction_ref
+
+        @async_transactional
+        async def write(transaction):
+            current = (await ref.get(transaction=transaction)).to_dict()
+            if self._unchanged(read, current):
+                transaction.set(ref, result)
+
+        await write(adb.transaction())
         return result
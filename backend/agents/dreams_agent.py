@@ -1,10 +1,18 @@
+import asyncio
 import json
 from datetime import datetime, timezone
 from services.firestore_service import get_full_summary, get_dreams
-from services.gemini_service import call_gemini_json  # ✅ UPDATED IMPORT
-from firebase_admin import firestore
+from services.firestore_async_service import get_dreams_async, get_full_summary_async
+from services.request_loader import load_many
+from services.gemini_service import (  # ✅ UPDATED IMPORT
+    call_gemini_json,
+    call_gemini_json_async,
+)
+from services.storage import get_client
 
-db = firestore.client()
+db = get_client()
+
+DREAM_PLAN_CACHE_TTL = 60 * 60
 
 
 class DreamPlannerService:
@@ -17,10 +25,32 @@ class DreamPlannerService:
     def predict(self):
         return self._compute_plan()
 
+    async def apredict(self):
+        summary, dreams = await asyncio.gather(
+            get_full_summary_async(self.user_id),
+            get_dreams_async(self.user_id),
+        )
+        plans, prompt = self._build(summary, dreams)
+        raw_response = await call_gemini_json_async(
+            prompt, cache_ttl=DREAM_PLAN_CACHE_TTL
+        )
+        return self._finish(plans, raw_response)
+
     def _compute_plan(self):
-        summary = get_full_summary(self.user_id)
-        dreams = get_dreams(self.user_id)
+        plans, prompt = self._prepare()
+
+        # 🔥 USE NEW JSON-SAFE GEMINI CALLER
+        raw_response = call_gemini_json(prompt, cache_ttl=DREAM_PLAN_CACHE_TTL)
+        return self._finish(plans, raw_response)
+
+    def _prepare(self):
+        summary, dreams = load_many(
+            lambda: get_full_summary(self.user_id),
+            lambda: get_dreams(self.user_id),
+        )
+        return self._build(summary, dreams)
 
+    def _build(self, summary, dreams):
         monthly_income = float(summary.get("monthlyIncome", 0))
         monthly_expense = float(summary.get("monthlyExpense", 0))
         projected_savings = monthly_income - monthly_expense
@@ -93,9 +123,9 @@ STRUCTURE (strict):
 }}
 """
 
-        # 🔥 USE NEW JSON-SAFE GEMINI CALLER
-        raw_response = call_gemini_json(prompt)
+        return plans, prompt
 
+    def _finish(self, plans, raw_response):
         cleaned = raw_response.strip()
         cleaned = cleaned.replace("```json", "").replace("```", "")
         cleaned = cleaned.replace(",}", "}").replace(",]", "]")
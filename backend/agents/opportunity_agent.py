@@ -1,22 +1,26 @@
 # agents/opportunity_agent.py
+import asyncio
 import os
 import math
 import time
 import json
 import requests
 import concurrent.futures
+import contextvars
 from functools import lru_cache
 from datetime import datetime
 
 
 # Import your existing services
-from services.firestore_service import get_user_transactions
-from services.gemini_service import call_gemini
+from services.firestore_service import get_recent_frame
+from services.firestore_async_service import get_recent_frame_async
+from services.gemini_service import call_gemini, call_gemini_async
 
 TOMTOM_KEY = os.getenv("TOMTOM_API_KEY")
 WEATHER_KEY = os.getenv("WEATHER_API_KEY")
 
 DEFAULT_HOURLY = 120.0  # fallback earning estimate
+HOURLY_LOOKBACK_DAYS = 90  # user's hourly rate from recent logs only
 
 # Initialize a global session to reuse TCP connections (Performance Boost)
 session = requests.Session()
@@ -152,23 +156,11 @@ def tomtom_reverse_geocode(lat, lon):
 # ----------------------------
 # Weak signal: compute user hourly
 # ----------------------------
-def compute_user_hourly(transactions):
-    if not transactions:
+def compute_user_hourly(frame):
+    # Income per hour over days with hours logged (TransactionFrame)
+    if frame is None or not len(frame):
         return None
-    total_i = 0.0
-    total_h = 0.0
-    for t in transactions:
-        try:
-            i = float(t.get("income") or 0)
-            h = float(t.get("hoursWorked") or 0)
-            if h > 0:
-                total_i += i
-                total_h += h
-        except Exception:
-            continue
-    if total_h == 0:
-        return None
-    return total_i / total_h
+    return frame.hourly_rate()
 
 
 # ----------------------------
@@ -282,30 +274,73 @@ class OpportunityScoutService:
         self.user_id = user_id
 
     def predict(self, lat: float = None, lon: float = None):
+        context, prompt = self._prepare(lat, lon)
+        return self._finish(context, call_gemini(prompt))
+
+    async def apredict(self, lat: float = None, lon: float = None):
+        lat, lon = self._location(lat, lon)
+        # Firestore read on the event loop while TomTom/weather run on threads
+        signals, transactions = await asyncio.gather(
+            asyncio.to_thread(self._fetch_signals, lat, lon),
+            self._arecent_frame(),
+        )
+
+        context, prompt = self._build(lat, lon, *signals, transactions)
+        return self._finish(context, await call_gemini_async(prompt))
+
+    async def _arecent_frame(self):
+        # History is optional: a failed read falls back to the default rate
+        try:
+            return await get_recent_frame_async(self.user_id, HOURLY_LOOKBACK_DAYS)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _location(lat, lon):
         # Default fallback (Mumbai center)
         if lat is None or lon is None:
-            lat, lon = 19.0760, 72.8777
-
-        now = datetime.now()
-        hour = now.hour
-        is_weekend = now.weekday() >= 5
+            return 19.0760, 72.8777
+        return lat, lon
 
-        # 1) PARALLEL DATA GATHERING
-        # We fetch Weather, Hotspots, Traffic, and User History all at once.
-        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+    @staticmethod
+    def _fetch_signals(lat, lon):
+        # Weather, Hotspots and Traffic all at once
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
             future_weather = executor.submit(get_weather, lat, lon)
             future_hotspots = executor.submit(detect_hotspots_around, lat, lon)
             future_user_traffic = executor.submit(get_tomtom_traffic, lat, lon)
-            future_transactions = executor.submit(get_user_transactions, self.user_id)
 
-            # Wait for results
-            weather = future_weather.result()
-            hotspots = future_hotspots.result()
-            traffic_at_user = future_user_traffic.result()
+            return (
+                future_weather.result(),
+                future_hotspots.result(),
+                future_user_traffic.result(),
+            )
+
+    def _prepare(self, lat, lon):
+        lat, lon = self._location(lat, lon)
+
+        # 1) PARALLEL DATA GATHERING
+        # User History is read while the external signals are fetched.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            # copy_context: share the request-scoped frame cache
+            future_transactions = executor.submit(
+                contextvars.copy_context().run,
+                get_recent_frame,
+                self.user_id,
+                HOURLY_LOOKBACK_DAYS,
+            )
+            signals = self._fetch_signals(lat, lon)
             try:
                 transactions = future_transactions.result()
             except Exception:
-                transactions = []
+                transactions = None
+
+        return self._build(lat, lon, *signals, transactions)
+
+    def _build(self, lat, lon, weather, hotspots, traffic_at_user, transactions):
+        now = datetime.now()
+        hour = now.hour
+        is_weekend = now.weekday() >= 5
 
         # 2) Logic Processing
         user_hourly = compute_user_hourly(transactions)
@@ -393,9 +428,14 @@ IMPORTANT:
 - "bestArea" must be the specific name from "top_hotspot.area" (e.g. "Powai", "Koramangala"), NOT just the city name.
 - Keep advice short.
 """
-        # 4) Call Gemini
-        ai_text = call_gemini(prompt)
+        return context, prompt
+
+    def _finish(self, context, ai_text):
+        # 4) Parse Gemini output
         ai_parsed = parse_json_text(ai_text) or {}
+        top_hotspot = context["top_hotspot"]
+        suggested_window = context["suggested_window"]
+        reasons = context["reasons"]
 
         # Fallbacks
         best_area = top_hotspot.get("area") if top_hotspot else "Nearby Area"
@@ -411,13 +451,13 @@ IMPORTANT:
         return {
             "bestTime": context["suggested_window"],
             "bestArea": best_area,
-            "expectedBoost": expected_boost,
-            "weather": weather,
-            "traffic": traffic_at_user,
+            "expectedBoost": context["expected_boost"],
+            "weather": context["weather"],
+            "traffic": context["traffic_at_user"],
             "hotspot_sample": top_hotspot,
-            "hotspots": hotspots[:4],
-            "finalHourlyUsed": round(final_hourly, 2),
-            "surgeScore": round(surge_score, 3),
+            "hotspots": context["hotspots"],
+            "finalHourlyUsed": context["final_hourly"],
+            "surgeScore": context["surge_score"],
             "reasons": reasons,
             "aiAdvice": ai_advice,
             "action": ai_action,
@@ -1,7 +1,11 @@
 # agents/smart_spend_agent.py
 import json
 from services.firestore_service import get_full_summary
-from services.gemini_service import call_gemini
+from services.firestore_async_service import get_full_summary_async
+from services.gemini_service import call_gemini, call_gemini_async
+
+# Today's figures change through the day, keep the warning fresh
+SMART_SPEND_CACHE_TTL = 15 * 60
 
 
 class SmartSpendGuardianService:
@@ -20,8 +24,20 @@ class SmartSpendGuardianService:
         return max(50, round(safe, 2))
 
     def predict(self):
-        summary = get_full_summary(self.user_id)
+        result, prompt = self._prepare()
+        result["tip"] = call_gemini(prompt, cache_ttl=SMART_SPEND_CACHE_TTL)
+        return result
+
+    async def apredict(self):
+        summary = await get_full_summary_async(self.user_id)
+        result, prompt = self._build(summary)
+        result["tip"] = await call_gemini_async(prompt, cache_ttl=SMART_SPEND_CACHE_TTL)
+        return result
+
+    def _prepare(self):
+        return self._build(get_full_summary(self.user_id))
 
+    def _build(self, summary):
         monthly_income = summary.get("monthlyIncome", 0)
         monthly_expense = summary.get("monthlyExpense", 0)
 
@@ -75,9 +91,7 @@ based on:
 Must be 1 sentence.
 """
 
-        ai_tip = call_gemini(prompt)
-
-        return {
+        result = {
             "safeDailyLimit": safe_daily,
             "latestDay": latest_date,
             "todayIncome": today_income,  # NEW
@@ -88,5 +102,6 @@ Must be 1 sentence.
             "projectedMonthly": projected_monthly,
             "expectedOvershoot": overshoot,
             "expensesToday": today_expenses,
-            "tip": ai_tip,
         }
+
+        return result, prompt
@@ -0,0 +1,288 @@
+# bench/run.py
+# Concurrent load per route against the backend; reports latency
+# percentiles and throughput.
+#
+#   cd backend && python -m bench.run --concurrency 32 --requests 300
+#   cd backend && python -m bench.run --url http://127.0.0.1:8765 --mix
+#
+# Without --url a bench.serve process is started (in-memory Firestore +
+# stubs) and stopped afterwards; extra serve options go after "--".
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+from bench.seed import CATEGORIES, user_id
+
+LAT, LON = 19.1176, 72.9060  # Powai
+
+# name -> (method, path, JSON body or None); {uid} / {today} are filled in
+ROUTES = {
+    "summary": ("GET", "/summary/{uid}", None),
+    "weekly": ("GET", "/summary/{uid}/weekly", None),
+    "categories": ("GET", "/summary/{uid}/categories", None),
+    "months": ("GET", "/summary/{uid}/months", None),
+    "trend": ("GET", "/summary/{uid}/trend?days=90", None),
+    "dreams": ("GET", "/dreams/{uid}", None),
+    "transaction": ("PUT", "/transactions/{uid}/{today}", "log"),
+    "chat-history": ("GET", "/ai/chat/{uid}/history?limit=20", None),
+    "cashflow": ("GET", "/cashflow/predict/{uid}", None),
+    "smart-guardian": ("GET", "/ai/smart-guardian/{uid}", None),
+    "dream-plan": ("GET", "/dreams/plan/{uid}", None),
+    "opportunity": ("GET", f"/ai/opportunity/{{uid}}?lat={LAT}&lon={LON}", None),
+    "portfolio": ("GET", "/ai/portfolio/{uid}", None),
+    "chat": ("POST", "/ai/chat/{uid}", {"message": "How much can I save weekly?"}),
+    "chat-stream": ("POST", "/ai/chat/{uid}/stream", {"message": "Is an SIP safe?"}),
+    "dashboard": ("GET", f"/dashboard/{{uid}}?lat={LAT}&lon={LON}", None),
+}
+
+
+def _body(kind):
+    if kind != "log":
+        return kind
+    # Today's log, as TodayLogCard sends it
+    return {
+        "income": round(random.uniform(300, 2500), 2),
+        "hoursWorked": round(random.uniform(2, 11), 1),
+        "expenses": {cat: round(random.uniform(20, 600), 2) for cat in CATEGORIES[:3]},
+    }
+
+
+class RouteStats:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+
+    def report(self, wall):
+        lat = np.asarray(self.latencies) * 1000
+        count = len(lat)
+        return {
+            "route": self.name,
+            "requests": count,
+            "errors": self.errors,
+            "p50Ms": round(float(np.percentile(lat, 50)), 1) if count else None,
+            "p99Ms": round(float(np.percentile(lat, 99)), 1) if count else None,
+            "meanMs": round(float(lat.mean()), 1) if count else None,
+            "maxMs": round(float(lat.max()), 1) if count else None,
+            "rps": round(count / wall, 1) if wall else None,
+            "statuses": dict(self.statuses),
+        }
+
+
+async def run_phase(client, names, users, concurrency, requests, duration):
+    """
+    `concurrency` workers issue requests (each to a random route in `names`
+    for a random user) until `requests` are done or `duration` elapses.
+    """
+    stats = {name: RouteStats(name) for name in names}
+    today = datetime.now().strftime("%Y-%m-%d")
+    issued = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal issued
+        while True:
+            if requests and issued >= requests:
+                return
+            if deadline and time.perf_counter() >= deadline:
+                return
+            issued += 1
+
+            name = random.choice(names)
+            method, path, body = ROUTES[name]
+            url = path.format(uid=random.choice(users), today=today)
+
+            started = time.perf_counter()
+            try:
+                # Body fully read: streamed routes are timed to their last line
+                response = await client.request(method, url, json=_body(body))
+                stats[name].statuses[response.status_code] += 1
+                if response.status_code >= 400:
+                    stats[name].errors += 1
+            except httpx.HTTPError as e:
+                stats[name].statuses[type(e).__name__] += 1
+                stats[name].errors += 1
+            stats[name].latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    # In a mixed phase each route's throughput is its share of the wall time
+    return [stats[name].report(wall) for name in names], wall
+
+
+async def _stub_calls(client):
+    try:
+        response = await client.get("/__bench/stats")
+        return response.json() if response.status_code == 200 else None
+    except httpx.HTTPError:
+        return None
+
+
+async def run(args, base_url):
+    users = [user_id(i) for i in range(args.users)]
+    names = args.routes or list(ROUTES)
+    phases = [names] if args.mix else [[name] for name in names]
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        results = []
+        for phase in phases:
+            if args.warmup:
+                await run_phase(client, phase, users, args.concurrency, args.warmup, 0)
+
+            before = await _stub_calls(client)
+            reports, wall = await run_phase(
+                client, phase, users, args.concurrency, args.requests, args.duration
+            )
+            after = await _stub_calls(client)
+
+            stub_calls = (
+                {k: after[k] - before.get(k, 0) for k in after}
+                if before and after
+                else None
+            )
+            for report in reports:
+                report["stubCalls"] = stub_calls
+            results.extend(reports)
+            for report in reports:
+                print_row(report)
+
+    return results
+
+
+def print_header():
+    print(
+        f"{'route':<16}{'reqs':>7}{'errs':>6}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'mean ms':>10}{'req/s':>9}  stub calls"
+    )
+
+
+def print_row(r):
+    def fmt(value):
+        return "-" if value is None else value
+
+    print(
+        f"{r['route']:<16}{r['requests']:>7}{r['errors']:>6}{fmt(r['p50Ms']):>10}"
+        f"{fmt(r['p99Ms']):>10}{fmt(r['meanMs']):>10}{fmt(r['rps']):>9}  "
+        f"{r['stubCalls'] or ''}",
+        flush=True,
+    )
+
+
+# ----------------------------------------------------------------------------
+# Server process
+# ----------------------------------------------------------------------------
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, serve_args):
+    port = _free_port()
+    command = [
+        sys.executable,
+        "-m",
+        "bench.serve",
+        "--port",
+        str(port),
+        "--users",
+        str(args.users),
+        *serve_args,
+    ]
+    process = subprocess.Popen(command)
+    base_url = f"http://127.0.0.1:{port}"
+
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"bench.serve exited with {process.returncode}")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+
+    process.terminate()
+    sys.exit("bench.serve did not come up in time")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Per-route latency / throughput benchmark for the backend"
+    )
+    parser.add_argument("--url", help="benchmark a running server instead")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument(
+        "--routes",
+        type=lambda s: [r for r in s.split(",") if r],
+        help=f"comma-separated subset of: {', '.join(ROUTES)}",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--requests", type=int, default=200, help="per phase (0 = until --duration)"
+    )
+    parser.add_argument("--duration", type=float, default=0, help="seconds per phase")
+    parser.add_argument("--warmup", type=int, default=0, help="requests per phase")
+    parser.add_argument(
+        "--mix", action="store_true", help="one phase with all routes interleaved"
+    )
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--json", help="also write the results to this file")
+
+    argv = sys.argv[1:] if argv is None else argv
+    serve_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, serve_args = argv[:split], argv[split + 1 :]
+
+    args = parser.parse_args(argv)
+    unknown = set(args.routes or ()) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+    if not args.requests and not args.duration:
+        parser.error("--requests 0 needs --duration")
+    return args, serve_args
+
+
+def main(argv=None):
+    args, serve_args = parse_args(argv)
+
+    process = None
+    base_url = args.url
+    if not base_url:
+        process, base_url = start_server(args, serve_args)
+
+    try:
+        print_header()
+        results = asyncio.run(run(args, base_url))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
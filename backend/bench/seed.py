@@ -0,0 +1,108 @@
+# bench/seed.py
+# Synthetic users: profile, N days of transaction logs, dreams, chat history
+
+import random
+from datetime import datetime, timedelta
+
+CATEGORIES = ("food", "fuel", "rent", "recharge", "maintenance", "groceries")
+GIG_TYPES = ("delivery", "ride-hailing", "freelance", "home services")
+# Firestore allows at most 500 writes per batch
+BATCH_LIMIT = 450
+
+
+def user_id(index: int) -> str:
+    return f"bench-user-{index:05d}"
+
+
+def _profile(rng):
+    income = rng.randrange(18000, 60000, 500)
+    return {
+        "name": f"Bench {rng.randint(1000, 9999)}",
+        "age": rng.randint(19, 55),
+        "sex": rng.choice(("M", "F")),
+        "gigType": rng.choice(GIG_TYPES),
+        "monthlyIncome": income,
+        "monthlyExpense": int(income * rng.uniform(0.5, 0.95)),
+        "income": income * 12,
+        "incomeAfterTax": int(income * 12 * 0.95),
+        "marriageStatus": rng.choice(("Single", "Married")),
+        "numOfKids": rng.randint(0, 3),
+        "ageOfParents": rng.randint(45, 80),
+        "riskAppetite": rng.choice(("Low", "Medium", "High")),
+        "healthConditions": "None",
+        "investmentAmount": rng.randrange(1000, 20000, 500),
+    }
+
+
+def _log(rng):
+    return {
+        "income": round(rng.uniform(300, 2500), 2),
+        "hoursWorked": round(rng.uniform(2, 11), 1),
+        "expenses": {
+            cat: round(rng.uniform(20, 600), 2)
+            for cat in rng.sample(CATEGORIES, rng.randint(1, 4))
+        },
+        "notes": "synthetic",
+    }
+
+
+def _dream(rng, today):
+    goal = rng.randrange(10000, 300000, 1000)
+    deadline = today + timedelta(days=rng.randint(60, 900))
+    return {
+        "title": rng.choice(("Bike", "Laptop", "Wedding", "Emergency fund", "Phone")),
+        "goal_amount": goal,
+        "saved_amount": int(goal * rng.uniform(0, 0.6)),
+        "deadline": deadline.strftime("%Y-%m-%d"),
+    }
+
+
+def seed_users(db, users: int, days: int, dreams: int = 2, chats: int = 12, seed=7):
+    """
+    Write `users` synthetic users through any Firestore-shaped client.
+    Returns their user IDs.
+    """
+    rng = random.Random(seed)
+    today = datetime.now()
+    ids = []
+
+    batch, pending = db.batch(), 0
+
+    def put(ref, data):
+        nonlocal batch, pending
+        batch.set(ref, data)
+        pending += 1
+        if pending >= BATCH_LIMIT:
+            batch.commit()
+            batch, pending = db.batch(), 0
+
+    for i in range(users):
+        uid = user_id(i)
+        ids.append(uid)
+        user_ref = db.collection("users").document(uid)
+        put(user_ref, _profile(rng))
+
+        for day in range(days):
+            # Gig workers skip some days
+            if rng.random() < 0.15:
+                continue
+            date = (today - timedelta(days=day)).strftime("%Y-%m-%d")
+            put(user_ref.collection("transactions").document(date), _log(rng))
+
+        for _ in range(dreams):
+            put(user_ref.collection("dreams").document(), _dream(rng, today))
+
+        started = today - timedelta(hours=chats)
+        for n in range(chats):
+            put(
+                user_ref.collection("chats").document(),
+                {
+                    "role": "user" if n % 2 == 0 else "assistant",
+                    "message": f"synthetic message {n}",
+                    "timestamp": started + timedelta(minutes=n),
+                },
+            )
+
+    if pending:
+        batch.commit()
+    return ids
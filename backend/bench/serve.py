@@ -0,0 +1,97 @@
+# bench/serve.py
+# Boots main.app under uvicorn on the in-memory storage backend (or the
+# Firestore emulator) with stubbed Gemini / TomTom / OpenWeather.
+#
+#   cd backend && python -m bench.serve --port 8765 --users 50 --days 180
+
+import argparse
+import os
+import sys
+import time
+
+from bench import stubs
+from bench.seed import seed_users
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Backend on in-memory storage + stubbed external APIs"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--firestore",
+        choices=("memory", "emulator"),
+        default="memory",
+        help="emulator: use the one at $FIRESTORE_EMULATOR_HOST",
+    )
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--days", type=int, default=180, help="days of logs per user")
+    parser.add_argument("--dreams", type=int, default=2, help="dreams per user")
+    parser.add_argument("--chats", type=int, default=12, help="chat messages per user")
+    parser.add_argument("--gemini-latency", type=float, default=0.8, help="seconds")
+    parser.add_argument("--tomtom-latency", type=float, default=0.15, help="seconds")
+    parser.add_argument("--weather-latency", type=float, default=0.1, help="seconds")
+    parser.add_argument(
+        "--jitter", type=float, default=0.2, help="+/- fraction of each latency"
+    )
+    parser.add_argument(
+        "--no-prompt-cache",
+        action="store_true",
+        help="every Gemini call reaches the stub (no cached responses)",
+    )
+    parser.add_argument("--skip-seed", action="store_true")
+    return parser.parse_args(argv)
+
+
+def _latency(seconds, jitter):
+    return stubs.Latency(seconds, seconds * jitter)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.firestore == "memory":
+        # STORAGE_DB (if set) persists it, e.g. to reuse a seeded dataset
+        os.environ["STORAGE_BACKEND"] = "memory"
+    elif not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        sys.exit("--firestore emulator needs FIRESTORE_EMULATOR_HOST")
+    else:
+        os.environ["STORAGE_BACKEND"] = "firestore"
+
+    # Backend modules create their clients at import time: configure first
+    import uvicorn
+
+    import main as backend
+    from services import gemini_service, mutual_funds
+    from services.storage import get_client
+
+    # No AMFI download competing with the measured requests
+    mutual_funds._refresher_started = True
+
+    installed = stubs.install(
+        gemini=_latency(args.gemini_latency, args.jitter),
+        tomtom=_latency(args.tomtom_latency, args.jitter),
+        weather=_latency(args.weather_latency, args.jitter),
+    )
+    if args.no_prompt_cache:
+        gemini_service.prompt_cache.max_entries = 0
+
+    @backend.app.get("/__bench/stats", include_in_schema=False)
+    def bench_stats():
+        return {name: stub.calls for name, stub in installed.items()}
+
+    if not args.skip_seed:
+        started = time.perf_counter()
+        ids = seed_users(get_client(), args.users, args.days, args.dreams, args.chats)
+        print(
+            f"Seeded {len(ids)} users x {args.days} days "
+            f"in {time.perf_counter() - started:.1f}s",
+            flush=True,
+        )
+
+    uvicorn.run(backend.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
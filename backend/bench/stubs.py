@@ -0,0 +1,184 @@
+# bench/stubs.py
+# Stand-ins for Gemini, TomTom and OpenWeather with configurable latency.
+# The backend's own call paths (semaphores, timeouts, prompt cache, shared
+# requests session) still run; only the network hop is replaced.
+
+import asyncio
+import json
+import random
+import time
+
+import requests
+from requests.adapters import BaseAdapter
+
+
+class Latency:
+    """
+    Seconds per call: `mean` plus uniform +/- `jitter` (never negative).
+    """
+
+    def __init__(self, mean=0.0, jitter=0.0):
+        self.mean = mean
+        self.jitter = jitter
+
+    def sample(self):
+        return max(0.0, self.mean + random.uniform(-self.jitter, self.jitter))
+
+
+# ----------------------------------------------------------------------------
+# Gemini
+# ----------------------------------------------------------------------------
+_TIPS = (
+    "Set aside 10% of every payout before spending.\n"
+    "Log fuel and food daily to spot leaks early.\n"
+    "Work the evening peak on rainy days for higher surge."
+)
+
+_JSON_REPLY = {
+    "bestTime": "6-9 PM",
+    "bestArea": "Powai",
+    "expectedBoost": 240,
+    "advice": "Stay near restaurant clusters.",
+    "action": "Plan a focused 3-hour shift.",
+    "why": "Dinner demand peaks in this window.",
+    "confidence": "Medium",
+}
+
+
+def reply_for(prompt: str) -> str:
+    # JSON-contract prompts (dream plan, opportunity scout) get JSON back
+    if "JSON" in prompt:
+        return json.dumps(_JSON_REPLY)
+    return _TIPS
+
+
+class _Part:
+    def __init__(self, text):
+        self.text = text
+
+
+class _Content:
+    def __init__(self, text):
+        self.parts = [_Part(text)]
+
+
+class _Candidate:
+    def __init__(self, text):
+        self.content = _Content(text)
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+        self.candidates = [_Candidate(text)]
+
+
+class _StubStream:
+    def __init__(self, text, latency, chunk_size):
+        self._chunks = [
+            text[i : i + chunk_size] for i in range(0, len(text), chunk_size)
+        ]
+        # First chunk pays the time-to-first-token, the rest arrive quickly
+        self._delays = [latency.sample()] + [0.005] * (len(self._chunks) - 1)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk, delay in zip(self._chunks, self._delays):
+            await asyncio.sleep(delay)
+            yield StubResponse(chunk)
+
+
+class StubGenerativeModel:
+    """
+    Quacks like genai.GenerativeModel for generate_content(_async).
+    """
+
+    def __init__(self, latency: Latency, chunk_size: int = 24):
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency.sample())
+        return StubResponse(reply_for(prompt))
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        if stream:
+            return _StubStream(reply_for(prompt), self.latency, self.chunk_size)
+        await asyncio.sleep(self.latency.sample())
+        return StubResponse(reply_for(prompt))
+
+
+# ----------------------------------------------------------------------------
+# TomTom + OpenWeather (requests transport adapter)
+# ----------------------------------------------------------------------------
+def _tomtom_body(url):
+    if "flowSegmentData" in url:
+        current = random.choice((18, 30, 45))
+        return {"flowSegmentData": {"currentSpeed": current, "freeFlowSpeed": 50}}
+    if "categorySearch" in url:
+        return {"results": [{}] * random.randint(5, 60)}
+    if "reverseGeocode" in url:
+        area = random.choice(("Powai", "Andheri West", "Bandra", "Dadar"))
+        return {"addresses": [{"address": {"municipalitySubdivision": area}}]}
+    return {}
+
+
+def _weather_body(url):
+    condition = random.choice(("Clear", "Clouds", "Rain"))
+    return {"weather": [{"main": condition}], "main": {"temp": 29.5}}
+
+
+class StubHTTPAdapter(BaseAdapter):
+    """
+    Answers requests.Session calls for one host with canned JSON after the
+    configured latency.
+    """
+
+    def __init__(self, body_for, latency: Latency):
+        super().__init__()
+        self.body_for = body_for
+        self.latency = latency
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency.sample())
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(self.body_for(request.url)).encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+def install(gemini: Latency, tomtom: Latency, weather: Latency):
+    """
+    Swap the external services for stubs. Call after the backend modules
+    are imported; returns the stubs so call counts can be reported.
+    """
+    from agents import opportunity_agent
+    from services import gemini_service
+
+    model = StubGenerativeModel(gemini)
+    gemini_service._model = model
+
+    # The agent skips TomTom / OpenWeather entirely without keys
+    opportunity_agent.TOMTOM_KEY = "bench"
+    opportunity_agent.WEATHER_KEY = "bench"
+    tomtom_adapter = StubHTTPAdapter(_tomtom_body, tomtom)
+    weather_adapter = StubHTTPAdapter(_weather_body, weather)
+    opportunity_agent.session.mount("https://api.tomtom.com", tomtom_adapter)
+    opportunity_agent.session.mount("https://api.openweathermap.org", weather_adapter)
+    opportunity_agent.tomtom_reverse_geocode.cache_clear()
+
+    return {"gemini": model, "tomtom": tomtom_adapter, "weather": weather_adapter}
@@ -5,11 +5,21 @@ from agents.Finance_agent import FinancialPortfolioAgent
 # ----------------------------------------------------------------------------
 
 
-from fastapi import FastAPI, Query, Response
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime
+
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from firebase_admin import firestore
 from agents.ai_chat import chatbot
-from services.firestore_service import save_chat_message
+from services.firestore_service import (
+    save_chat_message,
+    get_chat_history_page,
+    UnknownChatCursorError,
+)
 
 # Firestore CRUD
 from services.firestore_service import (
@@ -18,14 +28,31 @@ from services.firestore_service import (
     update_dream,
     delete_dream,
     get_summary,
+    save_transaction_log,
+    get_transactions_version,
+    get_weekly_summary,
+    get_category_breakdown,
+    get_monthly_totals,
+    get_daily_trend,
 )
+from services.firestore_async_service import get_summary_async
+from services.request_loader import start_request_scope, end_request_scope
+from services.storage import get_client
 
 from services.firestore_service import save_chat_message
 
-from services.gemini_service import generate_advice
+from services.gemini_service import generate_advice_async, prompt_cache
 
 # Mutual funds
-from services.mutual_funds import get_filtered_funds, fetch_amfi_data
+from services.mutual_funds import (
+    get_filtered_funds,
+    get_cached_funds,
+    get_funds_page,
+    stream_funds_ndjson,
+    parse_fields,
+    start_amfi_refresher,
+    StaleCursorError,
+)
 
 # FD, Bonds, Savings
 from services.fd_bond_service import (
@@ -44,7 +71,7 @@ from agents.smart_spend_agent import SmartSpendGuardianService
 from agents.dreams_agent import DreamPlannerService
 
 
-db = firestore.client()
+db = get_client()
 # ----------------------------------------------------------------------------
 # FastAPI App
 # ----------------------------------------------------------------------------
@@ -57,8 +84,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets browser clients read the NDJSON page cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
+
+@app.middleware("http")
+async def request_scope(request: Request, call_next):
+    # Per-request memo of user profile / transactions / dreams reads
+    token = start_request_scope()
+    try:
+        return await call_next(request)
+    finally:
+        end_request_scope(token)
+
+
+@app.on_event("startup")
+def warm_caches():
+    # Keep the AMFI NAV snapshot warm so /mutual-funds never waits on AMFI
+    start_amfi_refresher()
+
+
 # ----------------------------------------------------------------------------
 # Health
 # ----------------------------------------------------------------------------
@@ -100,6 +146,33 @@ def remove_dream(userId: str, dreamId: str):
     return {"message": "dream deleted"}
 
 
+# ----------------------------------------------------------------------------
+# Daily transaction logs (keeps the per-user aggregate in sync)
+# ----------------------------------------------------------------------------
+
+
+@app.put("/transactions/{userId}/{date}")
+def save_transaction(
+    userId: str, date: str, payload: dict, background_tasks: BackgroundTasks
+):
+    try:
+        day = datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        day = None
+    # strptime also takes "2026-1-5"; the date is the document ID, and range
+    # queries and month keys rely on the zero-padded form
+    if day is None or day.strftime("%Y-%m-%d") != date:
+        raise HTTPException(status_code=400, detail="date must be YYYY-MM-DD")
+
+    log = save_transaction_log(userId, date, payload)
+
+    # Cashflow only looks at the current month; recompute it after responding
+    if day.strftime("%Y-%m") == datetime.now().strftime("%Y-%m"):
+        background_tasks.add_task(CashflowPredictionService(userId).refresh)
+
+    return {"message": "log saved", "log": log}
+
+
 # ----------------------------------------------------------------------------
 # Summary (expenses + income aggregated)
 # ----------------------------------------------------------------------------
@@ -110,6 +183,42 @@ def summary_route(userId: str):
     return get_summary(userId)
 
 
+def _cached_summary(request: Request, userId: str, build):
+    """
+    ETag = URL + the user's transactions version + today's date (the
+    weekly/trend windows move daily), so a 304 costs one aggregate read.
+    """
+    version = f"{request.url.path}?{request.url.query}|"
+    version += f"{get_transactions_version(userId)}|{datetime.now():%Y-%m-%d}"
+    etag = '"' + hashlib.sha1(version.encode("utf-8")).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(build(), headers=headers)
+
+
+@app.get("/summary/{userId}/weekly")
+def weekly_summary(request: Request, userId: str):
+    return _cached_summary(request, userId, lambda: get_weekly_summary(userId))
+
+
+@app.get("/summary/{userId}/categories")
+def category_breakdown(request: Request, userId: str):
+    return _cached_summary(request, userId, lambda: get_category_breakdown(userId))
+
+
+@app.get("/summary/{userId}/months")
+def monthly_totals(request: Request, userId: str):
+    return _cached_summary(request, userId, lambda: get_monthly_totals(userId))
+
+
+@app.get("/summary/{userId}/trend")
+def daily_trend(request: Request, userId: str, days: int = Query(90, ge=1, le=366)):
+    return _cached_summary(request, userId, lambda: get_daily_trend(userId, days))
+
+
 # ----------------------------------------------------------------------------
 # Mutual Funds
 # ----------------------------------------------------------------------------
@@ -122,6 +231,7 @@ def mutual_funds(
     risk: str | None = None,
     category: str | None = None,
     search: str | None = None,
+    amc: str | None = None,
 ):
     return get_filtered_funds(
         page=page,
@@ -129,12 +239,38 @@ def mutual_funds(
         risk=risk,
         category=category,
         search=search,
+        amc=amc,
     )
 
 
 @app.get("/mutual-funds/all")
-def get_all_funds():
-    return {"results": fetch_amfi_data()}
+def get_all_funds(
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=5000),
+    fields: str | None = None,
+    output: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+):
+    try:
+        selected = parse_fields(fields)
+
+        # NDJSON: records are streamed as they are serialized
+        if output == "ndjson":
+            batches, next_cursor = stream_funds_ndjson(selected, cursor, limit)
+            return StreamingResponse(
+                batches,
+                media_type="application/x-ndjson",
+                headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+            )
+
+        if cursor is None and limit is None:
+            return {"results": get_cached_funds(selected)}
+
+        return get_funds_page(cursor, limit or 500, selected)
+
+    except StaleCursorError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ----------------------------------------------------------------------------
@@ -175,21 +311,26 @@ def loans(type: str | None = None, risk: str | None = None):
 
 
 @app.post("/generate-advice")
-def advice_route(payload: dict):
-    summary = get_summary(payload["userId"])
-    advice = generate_advice(summary)
+async def advice_route(payload: dict):
+    summary = await get_summary_async(payload["userId"])
+    advice = await generate_advice_async(summary)
     return {"advice": advice}
 
 
+@app.get("/ai/cache/stats")
+def gemini_cache_stats():
+    return prompt_cache.stats()
+
+
 # ----------------------------------------------------------------------------
 # Cashflow Predictor (UPDATED)
 # ----------------------------------------------------------------------------
 
 
 @app.get("/cashflow/predict/{userId}")
-def cashflow_predict(userId: str):
+async def cashflow_predict(userId: str):
     service = CashflowPredictionService(userId)
-    return service.predict()
+    return await service.apredict()
 
 
 # ----------------------------------------------------------------------------
@@ -198,13 +339,13 @@ def cashflow_predict(userId: str):
 
 
 @app.get("/ai/opportunity/{userId}")
-def opportunity_scout(
+async def opportunity_scout(
     userId: str,
     lat: float | None = None,
     lon: float | None = None,
 ):
     service = OpportunityScoutService(userId)
-    return service.predict(lat=lat, lon=lon)
+    return await service.apredict(lat=lat, lon=lon)
 
 
 # ----------------------------------------------------------------------------
@@ -213,29 +354,114 @@ def opportunity_scout(
 
 
 @app.get("/ai/smart-guardian/{userId}")
-def smart_guardian(userId: str):
+async def smart_guardian(userId: str):
     service = SmartSpendGuardianService(userId)
-    return service.predict()
+    return await service.apredict()
 
 
 # ----------------------------------------------------------------------------
 # Dreams Agent (NEW – Agent C)
 # ----------------------------------------------------------------------------
 @app.get("/dreams/plan/{userId}")
-def dream_plan(userId: str):
+async def dream_plan(userId: str):
     service = DreamPlannerService(userId)
-    return service.predict()
+    return await service.apredict()
 
 
 @app.get("/ai/portfolio/{userId}")
-def portfolio_allocation(userId: str):
+async def portfolio_allocation(userId: str):
     agent = FinancialPortfolioAgent(userId)
-    return agent.generate_portfolio()
+    return await agent.agenerate_portfolio()
+
+
+# ----------------------------------------------------------------------------
+# Dashboard: every agent card in one streamed response
+# ----------------------------------------------------------------------------
+
+
+async def _dashboard_section(name, coro):
+    started = time.perf_counter()
+    section = {"section": name, "ok": True}
+    try:
+        section["data"] = await coro
+    except Exception as e:
+        print(f"Dashboard {name} error:", e)
+        section.update(ok=False, data=None, error=str(e))
+    section["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return section
+
+
+@app.get("/dashboard/{userId}")
+async def dashboard(
+    userId: str,
+    lat: float | None = None,
+    lon: float | None = None,
+):
+    """
+    NDJSON: one line per section as soon as it finishes, then a "done" line.
+    Sections run concurrently; their shared Firestore reads (profile, logs,
+    aggregate, dreams) go through the request loader, so each is read once.
+    """
+    started = time.perf_counter()
+    sections = {
+        "cashflow": CashflowPredictionService(userId).apredict(),
+        "smartSpend": SmartSpendGuardianService(userId).apredict(),
+        "dreams": DreamPlannerService(userId).apredict(),
+        "opportunity": OpportunityScoutService(userId).apredict(lat=lat, lon=lon),
+    }
+    tasks = [
+        asyncio.create_task(_dashboard_section(name, coro))
+        for name, coro in sections.items()
+    ]
+
+    async def lines():
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished, default=str) + "\n"
+
+            total_ms = round((time.perf_counter() - started) * 1000, 1)
+            yield json.dumps({"section": "done", "ms": total_ms}) + "\n"
+        finally:
+            # Client went away: stop work nobody will read
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @app.post("/ai/chat/{userId}")
-def finance_chat(userId: str, payload: dict):
+async def finance_chat(userId: str, payload: dict):
     user_message = payload.get("message", "")
 
-    agent = chatbot(userId)
-    return agent.chat(user_message)
+    # Loads profile + history from Firestore
+    agent = await chatbot.aload(userId)
+    return await agent.achat(user_message)
+
+
+@app.get("/ai/chat/{userId}/history")
+def chat_history(
+    userId: str,
+    before: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    try:
+        return get_chat_history_page(userId, before=before, limit=limit)
+    except UnknownChatCursorError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.post("/ai/chat/{userId}/stream")
+async def finance_chat_stream(userId: str, payload: dict):
+    user_message = payload.get("message", "")
+    agent = await chatbot.aload(userId)
+
+    async def events():
+        async for event, data in agent.achat_stream(user_message):
+            body = {"text": data} if event == "token" else data
+            yield f"event: {event}\ndata: {json.dumps(body)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,205 @@
+# services/firestore_async_service.py
+# AsyncClient versions of the firestore_service reads/writes, for async
+# endpoints and agents: reads run on the event loop instead of a worker
+# thread each, and independent reads are gathered concurrently.
+
+import asyncio
+from datetime import datetime
+
+from firebase_admin import firestore
+
+from services.firestore_service import (
+    CHAT_HISTORY_WINDOW,
+    FRAME_LOG_FIELDS,
+    SUMMARY_LOG_FIELDS,
+    aggregate_from,
+    chat_message,
+    date_range_query,
+    full_summary_from,
+    last_log_query,
+    logs_from,
+    may_replace_aggregate,
+    month_range,
+    onboarding_fields_from,
+    recent_start,
+    settled_aggregate,
+    summary_from,
+)
+from services.request_loader import aload
+from services.storage import async_transactional, get_async_client
+from services.transaction_frame import TransactionFrame
+
+adb = get_async_client()
+
+
+def user_ref(user_id: str):
+    return adb.collection("users").document(user_id)
+
+
+# ----------------------------------------------------------------------------
+# Profile + dreams
+# ----------------------------------------------------------------------------
+async def get_user_doc_async(user_id: str):
+    async def fetch():
+        return (await user_ref(user_id).get()).to_dict()
+
+    return await aload(user_id, "profile", fetch)
+
+
+async def get_onboarding_fields_async(user_id: str) -> dict:
+    return onboarding_fields_from(await get_user_doc_async(user_id))
+
+
+async def get_dreams_async(user_id: str):
+    async def fetch():
+        dreams = []
+        async for doc in user_ref(user_id).collection("dreams").stream():
+            item = doc.to_dict()
+            item["id"] = doc.id
+            dreams.append(item)
+        return dreams
+
+    return await aload(user_id, "dreams", fetch)
+
+
+# ----------------------------------------------------------------------------
+# Transactions
+# ----------------------------------------------------------------------------
+async def get_transactions_between_async(
+    user_id: str, start: str = None, end: str = None, fields: tuple = None
+):
+    async def fetch():
+        try:
+            return await _read_transactions_async(user_id, start, end, fields)
+
+        except Exception as e:
+            print("Error fetching user transactions:", e)
+            return []
+
+    return await aload(user_id, ("transactions", start, end, fields), fetch)
+
+
+async def _read_transactions_async(
+    user_id: str, start: str = None, end: str = None, fields: tuple = None
+):
+    # Unmemoized, and raises on failure (unlike get_transactions_between_async)
+    trans_ref = user_ref(user_id).collection("transactions")
+    query = date_range_query(trans_ref, start, end, fields)
+    return logs_from([doc async for doc in query.stream()])
+
+
+async def get_user_transactions_async(user_id: str, fields: tuple = None):
+    return await get_transactions_between_async(user_id, fields=fields)
+
+
+async def get_transaction_frame_async(user_id: str, start: str = None, end: str = None):
+    async def fetch():
+        logs = await get_transactions_between_async(
+            user_id, start, end, FRAME_LOG_FIELDS
+        )
+        return TransactionFrame.from_logs(logs)
+
+    return await aload(user_id, ("transactions", start, end, "frame"), fetch)
+
+
+async def get_month_frame_async(user_id: str, year: int, month: int):
+    return await get_transaction_frame_async(user_id, *month_range(year, month))
+
+
+async def get_recent_frame_async(user_id: str, days: int):
+    return await get_transaction_frame_async(user_id, recent_start(days))
+
+
+async def get_transaction_aggregate_async(user_id: str) -> dict:
+    async def fetch():
+        ref = user_ref(user_id).collection("aggregates").document("transactions")
+        snapshot, last_date = await asyncio.gather(
+            ref.get(), _last_log_date_async(user_id)
+        )
+        behind = snapshot.to_dict()
+        settled = settled_aggregate(behind, last_date)
+        if settled is not None:
+            return settled
+
+        # First use, format change or logs written elsewhere: one full scan,
+        # then kept incrementally. A failed scan raises rather than storing
+        # an aggregate built from it.
+        logs = await _read_transactions_async(user_id, fields=FRAME_LOG_FIELDS)
+        aggregate = aggregate_from(TransactionFrame.from_logs(logs))
+
+        @async_transactional
+        async def write(transaction):
+            # Same rule as rebuild_transaction_aggregate
+            stored = (await ref.get(transaction=transaction)).to_dict()
+            if not may_replace_aggregate(stored, behind):
+                return stored
+            transaction.set(ref, aggregate)
+            return aggregate
+
+        return await write(adb.transaction())
+
+    return await aload(user_id, "aggregate", fetch)
+
+
+async def _last_log_date_async(user_id: str):
+    query = last_log_query(user_ref(user_id).collection("transactions"))
+    docs = [doc async for doc in query.stream()]
+    return docs[0].id if docs else None
+
+
+# ----------------------------------------------------------------------------
+# Summaries
+# ----------------------------------------------------------------------------
+async def get_summary_async(user_id: str) -> dict:
+    user_doc, aggregate = await asyncio.gather(
+        get_user_doc_async(user_id),
+        get_transaction_aggregate_async(user_id),
+    )
+    return summary_from(user_doc, aggregate)
+
+
+async def get_full_summary_async(user_id: str, include_logs: bool = False) -> dict:
+    today_str = datetime.now().strftime("%Y-%m-%d")
+
+    reads = [
+        get_user_doc_async(user_id),
+        get_transaction_aggregate_async(user_id),
+        get_transactions_between_async(
+            user_id, today_str, today_str, SUMMARY_LOG_FIELDS
+        ),
+    ]
+    if include_logs:
+        reads.append(get_user_transactions_async(user_id, SUMMARY_LOG_FIELDS))
+
+    user_doc, aggregate, today_logs, *logs = await asyncio.gather(*reads)
+    return full_summary_from(
+        user_doc, aggregate, today_logs, today_str, logs[0] if logs else None
+    )
+
+
+# ----------------------------------------------------------------------------
+# Chat
+# ----------------------------------------------------------------------------
+async def get_recent_chat_history_async(user_id: str, limit: int = CHAT_HISTORY_WINDOW):
+    query = (
+        user_ref(user_id)
+        .collection("chats")
+        .order_by("timestamp", direction=firestore.Query.DESCENDING)
+        .limit(limit)
+    )
+
+    messages = [d.to_dict() async for d in query.stream()]
+    messages.reverse()
+    return messages
+
+
+async def get_chat_memory_async(user_id: str) -> dict:
+    ref = user_ref(user_id).collection("chatMemory").document("summary")
+    return (await ref.get()).to_dict() or {}
+
+
+async def save_chat_message_async(
+    user_id: str, role: str, message: str, timestamp=None
+):
+    chats = user_ref(user_id).collection("chats")
+    return await chats.add(chat_message(role, message, timestamp))
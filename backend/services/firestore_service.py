@@ -4,26 +4,41 @@
 # services/firestore_service.py
 # This file handles all Firestore interactions
 
-import firebase_admin
-from firebase_admin import credentials, firestore
-from datetime import datetime
-
-# Initialize Firebase Admin only once
-if not firebase_admin._apps:
-    cred = credentials.Certificate("firebase-key.json")
-    firebase_admin.initialize_app(cred)
-
-# Correct Firestore client
-db = firestore.client()
+from firebase_admin import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+from datetime import datetime, timedelta
+from services.request_loader import load, load_many, invalidate
+from services.storage import get_client, transactional
+from services.transaction_frame import TransactionFrame
+
+# Firestore, or the in-memory store (STORAGE_BACKEND, see services/storage.py)
+db = get_client()
+
+# Messages the chatbot keeps in its prompt context
+CHAT_HISTORY_WINDOW = 10
+
+
+# User profile doc, read once per request
+def get_user_doc(user_id: str):
+    return load(
+        user_id,
+        "profile",
+        lambda: db.collection("users").document(user_id).get().to_dict(),
+    )
 
 
 # Add dream
 def add_dream(user_id, data):
+    invalidate(user_id, "dreams")
     return db.collection("users").document(user_id).collection("dreams").add(data)
 
 
 # Get all dreams
 def get_dreams(user_id):
+    return load(user_id, "dreams", lambda: _fetch_dreams(user_id))
+
+
+def _fetch_dreams(user_id):
     docs = db.collection("users").document(user_id).collection("dreams").stream()
 
     dreams = []
@@ -37,6 +52,7 @@ def get_dreams(user_id):
 
 # Update dream
 def update_dream(user_id, dream_id, data):
+    invalidate(user_id, "dreams")
     return (
         db.collection("users")
         .document(user_id)
@@ -48,6 +64,7 @@ def update_dream(user_id, dream_id, data):
 
 # Delete dream
 def delete_dream(user_id, dream_id):
+    invalidate(user_id, "dreams")
     return (
         db.collection("users")
         .document(user_id)
@@ -58,9 +75,14 @@ def delete_dream(user_id, dream_id):
 
 
 def get_summary(user_id: str) -> dict:
-    user_ref = db.collection("users").document(user_id)
-    user_doc = user_ref.get().to_dict()
+    user_doc, aggregate = load_many(
+        lambda: get_user_doc(user_id),
+        lambda: get_transaction_aggregate(user_id),
+    )
+    return summary_from(user_doc, aggregate)
 
+
+def summary_from(user_doc, aggregate) -> dict:
     if not user_doc:
         return {
             "totalIncome": 0,
@@ -79,53 +101,372 @@ def get_summary(user_id: str) -> dict:
         "byCategory": {},
     }
 
-    trans_ref = user_ref.collection("transactions")
-    trans_docs = trans_ref.stream()
-
-    category_totals = {}
-
-    for t in trans_docs:
-        data = t.to_dict()
-        expenses = data.get("expenses", {})
+    # Category totals come from the aggregate doc, not a scan of every log
+    summary["byCategory"] = aggregate["byCategory"]
 
-        for cat, amt in expenses.items():
-            value = float(amt) if isinstance(amt, str) else (amt or 0)
-            category_totals[cat] = category_totals.get(cat, 0) + value
+    return summary
 
-    summary["byCategory"] = category_totals
 
-    return summary
+# Field masks for log reads: only the fields a caller consumes come over
+# the wire ("date" is the doc ID and always present)
+FRAME_LOG_FIELDS = ("income", "expenses", "hoursWorked")
+SUMMARY_LOG_FIELDS = ("income", "expenses")
 
 
-def get_user_transactions(user_id: str):
+def get_user_transactions(user_id: str, fields: tuple = None):
     """
     Fetch all daily transaction logs for the user.
     Expected structure:
     users/{userId}/transactions/{YYYY-MM-DD}
     """
-    try:
-        trans_ref = db.collection("users").document(user_id).collection("transactions")
-        docs = trans_ref.stream()
+    return get_transactions_between(user_id, fields=fields)
 
-        logs = []
-        for doc in docs:
-            data = doc.to_dict()
-            data["date"] = doc.id  # 🔥 THIS IS THE FIX
-            logs.append(data)
 
-        return logs
+def get_transactions_between(
+    user_id: str, start: str = None, end: str = None, fields: tuple = None
+):
+    """
+    Daily logs with start <= date <= end (inclusive YYYY-MM-DD bounds, both
+    optional). Doc IDs are the dates, so the range is a document-ID filter
+    and Firestore only returns the requested window.
+    With `fields`, only those fields of each log are read (projection query).
+    """
+    return load(
+        user_id,
+        ("transactions", start, end, fields),
+        lambda: _fetch_transactions(user_id, start, end, fields),
+    )
+
+
+def _fetch_transactions(user_id: str, start: str, end: str, fields: tuple):
+    try:
+        return _read_transactions(user_id, start, end, fields)
 
     except Exception as e:
         print("Error fetching user transactions:", e)
         return []
 
 
-def get_full_summary(user_id: str) -> dict:
+def _read_transactions(
+    user_id: str, start: str = None, end: str = None, fields: tuple = None
+):
+    # Unmemoized, and raises on failure (unlike get_transactions_between)
+    trans_ref = db.collection("users").document(user_id).collection("transactions")
+    query = date_range_query(trans_ref, start, end, fields)
+
+    return logs_from(query.stream())
+
+
+def month_range(year: int, month: int):
+    # "-31" sorts after every real day of the month
+    prefix = f"{year:04d}-{month:02d}"
+    return f"{prefix}-01", f"{prefix}-31"
+
+
+def recent_start(days: int) -> str:
+    return (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+
+def date_range_query(
+    trans_ref, start: str = None, end: str = None, fields: tuple = None
+):
+    # Works for sync and async collection refs alike
+    query = trans_ref
+    if fields:
+        query = query.select(list(fields))
+    if start:
+        query = query.where(
+            filter=firestore.FieldFilter(
+                FieldPath.document_id(), ">=", trans_ref.document(start)
+            )
+        )
+    if end:
+        query = query.where(
+            filter=firestore.FieldFilter(
+                FieldPath.document_id(), "<=", trans_ref.document(end)
+            )
+        )
+    return query
+
+
+def logs_from(docs):
+    logs = []
+    for doc in docs:
+        data = doc.to_dict()
+        data["date"] = doc.id  # 🔥 THIS IS THE FIX
+        logs.append(data)
+
+    return logs
+
+
+# Same windows as NumPy columns (see services/transaction_frame.py),
+# built once per request and shared by every agent that needs them
+def get_transaction_frame(user_id: str, start: str = None, end: str = None):
+    return load(
+        user_id,
+        ("transactions", start, end, "frame"),
+        lambda: TransactionFrame.from_logs(
+            get_transactions_between(user_id, start, end, FRAME_LOG_FIELDS)
+        ),
+    )
+
+
+def get_month_frame(user_id: str, year: int, month: int):
+    return get_transaction_frame(user_id, *month_range(year, month))
+
+
+def get_recent_frame(user_id: str, days: int):
+    return get_transaction_frame(user_id, recent_start(days))
+
+
+# ----------------------------------------------------------------------------
+# Per-user transaction aggregate
+# users/{userId}/aggregates/transactions holds running totals over every
+# daily log, updated in the same transaction as the log it reflects.
+# Logs written some other way (old clients, bench seed, console edits) are
+# only picked up if they add a day after the aggregate's lastDate: every read
+# compares it with the newest log ID and rebuilds when it is behind. Edits to
+# days already counted are not detected; rebuild_transaction_aggregate (or a
+# version bump) reconciles those.
+# ----------------------------------------------------------------------------
+TRANSACTION_AGGREGATE_VERSION = 2
+
+
+def _amount(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _aggregate_ref(user_id: str):
+    return (
+        db.collection("users")
+        .document(user_id)
+        .collection("aggregates")
+        .document("transactions")
+    )
+
+
+def _empty_aggregate() -> dict:
+    return {
+        "version": TRANSACTION_AGGREGATE_VERSION,
+        "days": 0,
+        "totalIncome": 0.0,
+        "totalExpenses": 0.0,
+        "byCategory": {},
+        # "YYYY-MM" -> {"income", "expenses", "days"}
+        "byMonth": {},
+        # Newest log date counted
+        "lastDate": None,
+    }
+
+
+def _apply_log(aggregate: dict, date: str, log: dict, sign: int):
+    """
+    Add (sign=1) or remove (sign=-1) one day's log from the aggregate.
+    """
+    if not log:
+        return
+
+    income = _amount(log.get("income"))
+    spent = 0.0
+    for cat, amt in (log.get("expenses") or {}).items():
+        value = _amount(amt)
+        spent += value
+        total = round(aggregate["byCategory"].get(cat, 0) + sign * value, 2)
+        if total:
+            aggregate["byCategory"][cat] = total
+        else:
+            # Edited down to nothing: same as a rebuild, which never sees it
+            aggregate["byCategory"].pop(cat, None)
+
+    month_key = date[:7]
+    month = aggregate["byMonth"].setdefault(
+        month_key, {"income": 0.0, "expenses": 0.0, "days": 0}
+    )
+    month["income"] = round(month["income"] + sign * income, 2)
+    month["expenses"] = round(month["expenses"] + sign * spent, 2)
+    month["days"] += sign
+    if month["days"] <= 0:
+        del aggregate["byMonth"][month_key]
+
+    aggregate["days"] += sign
+    if sign > 0:
+        aggregate["lastDate"] = max(aggregate.get("lastDate") or "", date)
+    aggregate["totalIncome"] = round(aggregate["totalIncome"] + sign * income, 2)
+    aggregate["totalExpenses"] = round(aggregate["totalExpenses"] + sign * spent, 2)
+
+
+def _merge_log(old: dict, new: dict) -> dict:
+    # Same result as a client-side setDoc(..., { merge: true })
+    merged = dict(old or {})
+    for key, value in new.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def rebuild_transaction_aggregate(user_id: str, behind: dict = None) -> dict:
+    """
+    Full scan of the user's logs. Only needed once per user (or after a
+    format change); afterwards save_transaction_log keeps it current.
+    A failed scan raises: an aggregate built from it would be kept forever.
+    `behind` is a current-format aggregate found missing newer logs; it is
+    replaced only if no save has moved it since.
+    """
+    logs = _read_transactions(user_id, fields=FRAME_LOG_FIELDS)
+    aggregate = aggregate_from(TransactionFrame.from_logs(logs))
+    agg_ref = _aggregate_ref(user_id)
+
+    @transactional
+    def write(transaction):
+        stored = agg_ref.get(transaction=transaction).to_dict()
+        if not may_replace_aggregate(stored, behind):
+            return stored
+        transaction.set(agg_ref, aggregate)
+        return aggregate
+
+    return write(db.transaction())
+
+
+def aggregate_from(frame) -> dict:
+    aggregate = _empty_aggregate()
+    aggregate.update(
+        days=len(frame),
+        totalIncome=round(frame.total_income(), 2),
+        totalExpenses=round(frame.total_spent(), 2),
+        byCategory={
+            cat: round(total, 2)
+            for cat, total in frame.category_totals().items()
+            if round(total, 2)
+        },
+        byMonth=frame.by_month(),
+        lastDate=str(frame.dates[-1]) if len(frame) else None,
+    )
+    aggregate["updatedAt"] = datetime.utcnow()
+    return aggregate
+
+
+def get_transaction_aggregate(user_id: str) -> dict:
+    return load(user_id, "aggregate", lambda: _fetch_transaction_aggregate(user_id))
+
+
+def _fetch_transaction_aggregate(user_id: str) -> dict:
+    aggregate, last_date = load_many(
+        lambda: _aggregate_ref(user_id).get().to_dict(),
+        lambda: _last_log_date(user_id),
+    )
+    settled = settled_aggregate(aggregate, last_date)
+    if settled is not None:
+        return settled
+    return rebuild_transaction_aggregate(user_id, behind=aggregate)
+
+
+def _last_log_date(user_id: str):
+    trans_ref = db.collection("users").document(user_id).collection("transactions")
+    docs = list(last_log_query(trans_ref).stream())
+    return docs[0].id if docs else None
+
+
+def last_log_query(trans_ref):
+    # Newest log, ID only: one document read to tell if the aggregate is behind
+    return (
+        trans_ref.order_by(
+            FieldPath.document_id(), direction=firestore.Query.DESCENDING
+        )
+        .limit(1)
+        .select([])
+    )
+
+
+def settled_aggregate(aggregate, last_date):
+    """
+    The aggregate to serve as stored, or None if it must be rebuilt: missing,
+    in an old format or behind the newest log. Without logs nothing is
+    written: an unknown user reads as the empty aggregate.
+    """
+    if last_date is None:
+        return aggregate if is_current_aggregate(aggregate) else _empty_aggregate()
+    if is_current_aggregate(aggregate) and last_date <= (
+        aggregate.get("lastDate") or ""
+    ):
+        return aggregate
+    return None
+
+
+def may_replace_aggregate(stored, behind) -> bool:
+    """
+    A rebuild overwrites the stored aggregate only if it is not current, or is
+    still the one found behind (every save stamps updatedAt, so an equal stamp
+    means no save landed since). Otherwise concurrent saves' deltas are kept.
+    """
+    if not is_current_aggregate(stored):
+        return True
+    return bool(behind) and stored.get("updatedAt") == behind.get("updatedAt")
+
+
+def is_current_aggregate(aggregate) -> bool:
+    return bool(aggregate) and aggregate.get("version") == TRANSACTION_AGGREGATE_VERSION
+
+
+def save_transaction_log(user_id: str, date: str, log: dict) -> dict:
+    """
+    Merge `log` into users/{userId}/transactions/{date} and move the
+    aggregate by the difference, atomically. Returns the stored log.
+    """
+    log_ref = (
+        db.collection("users")
+        .document(user_id)
+        .collection("transactions")
+        .document(date)
+    )
+    agg_ref = _aggregate_ref(user_id)
+
+    # Seed the aggregate first so the delta below applies to full totals
+    get_transaction_aggregate(user_id)
+
+    @transactional
+    def write(transaction):
+        old = log_ref.get(transaction=transaction).to_dict()
+        aggregate = agg_ref.get(transaction=transaction).to_dict()
+        if not is_current_aggregate(aggregate):
+            # Only possible without any logs: the seed above rebuilds otherwise
+            aggregate = _empty_aggregate()
+        merged = _merge_log(old, log)
+
+        _apply_log(aggregate, date, old, -1)
+        _apply_log(aggregate, date, merged, 1)
+        aggregate["updatedAt"] = datetime.utcnow()
+
+        transaction.set(log_ref, merged)
+        transaction.set(agg_ref, aggregate)
+        # The stored cashflow prediction no longer matches its inputs;
+        # staleAt also tells an in-flight refresh that its read is outdated
+        transaction.set(
+            db.collection("users")
+            .document(user_id)
+            .collection("cashflow")
+            .document("prediction"),
+            {"stale": True, "staleAt": datetime.utcnow()},
+            merge=True,
+        )
+        return merged
+
+    stored = write(db.transaction())
+    invalidate(user_id, "transactions")
+    invalidate(user_id, "aggregate")
+    return stored
+
+
+def get_full_summary(user_id: str, include_logs: bool = False) -> dict:
     """
     Returns a complete summary of the user's financial activity:
     - monthlyIncome, monthlyExpense
     - total category spend (monthly)
-    - all daily logs
+    - all daily logs (only with include_logs=True; needs a full scan)
     - today's spending
     - category dominance
     - avg daily spend
@@ -133,67 +474,64 @@ def get_full_summary(user_id: str) -> dict:
     - expected overshoot
     """
 
-    user_ref = db.collection("users").document(user_id)
-    user_doc = user_ref.get().to_dict() or {}
-
-    monthly_income = float(user_doc.get("monthlyIncome", 0))
-    monthly_expense = float(user_doc.get("monthlyExpense", 0))
-
-    # -----------------------------------------
-    # 1. Fetch ALL daily logs
-    # -----------------------------------------
-    trans_ref = user_ref.collection("transactions")
-    trans_docs = trans_ref.stream()
-
-    all_logs = []
-    category_totals = {}
     today_str = datetime.now().strftime("%Y-%m-%d")
 
-    today_expenses = {}
-    today_spent = 0
+    # Independent reads, issued together
+    user_doc, aggregate, today_logs = load_many(
+        lambda: get_user_doc(user_id),
+        lambda: get_transaction_aggregate(user_id),
+        lambda: get_transactions_between(
+            user_id, today_str, today_str, SUMMARY_LOG_FIELDS
+        ),
+    )
+    logs = get_user_transactions(user_id, SUMMARY_LOG_FIELDS) if include_logs else None
 
-    for doc in trans_docs:
-        data = doc.to_dict()
+    return full_summary_from(user_doc, aggregate, today_logs, today_str, logs)
 
-        date = data.get("date") or doc.id  # use doc.id if needed
-        expenses = data.get("expenses", {})
-        income = float(data.get("income", 0))
 
-        # Add log to list
-        all_logs.append({"date": date, "income": income, "expenses": expenses})
+def full_summary_from(user_doc, aggregate, today_logs, today_str, logs=None):
+    user_doc = user_doc or {}
 
-        # Build category totals (monthly)
-        for cat, amt in expenses.items():
-            value = float(amt or 0)
-            category_totals[cat] = category_totals.get(cat, 0) + value
+    monthly_income = float(user_doc.get("monthlyIncome", 0))
+    monthly_expense = float(user_doc.get("monthlyExpense", 0))
 
-        # Check today
-        if date == today_str:
-            today_expenses = expenses
-            today_spent = sum(float(v or 0) for v in expenses.values())
+    # -----------------------------------------
+    # 1. Running totals + today's log
+    # -----------------------------------------
+    category_totals = aggregate["byCategory"]
+    today_log = today_logs[0] if today_logs else {}
+    today_expenses = today_log.get("expenses", {})
+    today_income = _amount(today_log.get("income"))
+    today_spent = sum(_amount(v) for v in today_expenses.values())
+
+    all_logs = None
+    if logs is not None:
+        all_logs = [
+            {
+                "date": log.get("date"),
+                "income": _amount(log.get("income")),
+                "expenses": log.get("expenses", {}),
+            }
+            for log in logs
+        ]
 
     # -----------------------------------------
     # 2. Category dominance (SmartSpend)
     # -----------------------------------------
     category_risk = None
     if today_expenses:
-        total_today = sum(float(v or 0) for v in today_expenses.values())
+        total_today = sum(_amount(v) for v in today_expenses.values())
         if total_today > 0:
             for cat, val in today_expenses.items():
-                if float(val or 0) / total_today >= 0.40:  # >40%
+                if _amount(val) / total_today >= 0.40:  # >40%
                     category_risk = cat
                     break
 
     # -----------------------------------------
     # 3. Spending velocity (SmartSpend)
     # -----------------------------------------
-    if all_logs:
-        total_days = len(all_logs)
-        total_spent = 0
-        for log in all_logs:
-            total_spent += sum(float(v or 0) for v in log["expenses"].values())
-
-        avg_daily = total_spent / total_days
+    if aggregate["days"]:
+        avg_daily = aggregate["totalExpenses"] / aggregate["days"]
         projected_monthly = avg_daily * 30
     else:
         avg_daily = 0
@@ -204,27 +542,112 @@ def get_full_summary(user_id: str) -> dict:
     # -----------------------------------------
     # Final summary
     # -----------------------------------------
-    return {
+    summary = {
         "monthlyIncome": monthly_income,
         "monthlyExpense": monthly_expense,
         "balance": monthly_income - monthly_expense,
         "byCategory": category_totals,
+        "byMonth": aggregate["byMonth"],
         "today": {
             "date": today_str,
+            "income": today_income,
             "expenses": today_expenses,
             "todaySpent": today_spent,
             "categoryRisk": category_risk,
         },
-        "logs": all_logs,
         "avgDailySpend": round(avg_daily, 2),
         "projectedMonthlySpend": round(projected_monthly, 2),
         "expectedOvershoot": round(overshoot, 2),
     }
+    if all_logs is not None:
+        summary["logs"] = all_logs
+    return summary
+
+
+# ----------------------------------------------------------------------------
+# Dashboard widgets (weekly summary, categories, months, daily trend)
+# ----------------------------------------------------------------------------
+def get_transactions_version(user_id: str) -> str:
+    """
+    Changes whenever a log is saved (the aggregate is rewritten with it);
+    widget ETags are derived from it.
+    """
+    return str(get_transaction_aggregate(user_id).get("updatedAt"))
+
+
+def get_weekly_summary(user_id: str, days: int = 7) -> dict:
+    frame = get_recent_frame(user_id, days)
+
+    total_income = frame.total_income()
+    total_expenses = frame.total_spent()
+    total_hours = float(frame.hours.sum())
+
+    best_day = None
+    best_day_income = 0.0
+    if len(frame) and frame.income.max() > 0:
+        best = int(frame.income.argmax())
+        best_day = str(frame.dates[best])
+        best_day_income = float(frame.income[best])
+
+    # Newest first
+    daily = [
+        {
+            "date": d["date"],
+            "income": d["income"],
+            "expenses": d["spent"],
+            "profit": d["income"] - d["spent"],
+        }
+        for d in reversed(frame.daily())
+    ]
+
+    return {
+        "totalIncome": total_income,
+        "totalExpenses": total_expenses,
+        "netProfit": total_income - total_expenses,
+        "bestDay": best_day,
+        "bestDayIncome": best_day_income,
+        "efficiencyPerHour": round(total_income / total_hours) if total_hours else 0,
+        "totalHours": total_hours,
+        "daily": daily,
+    }
+
+
+def get_category_breakdown(user_id: str) -> dict:
+    by_category = get_transaction_aggregate(user_id)["byCategory"]
+    total = sum(by_category.values())
+
+    categories = [
+        {
+            "name": name,
+            "value": value,
+            "percentage": round(value / total * 100, 1) if total else 0,
+        }
+        for name, value in by_category.items()
+    ]
+    # Highest spend first
+    categories.sort(key=lambda c: c["value"], reverse=True)
+
+    return {"total": round(total, 2), "categories": categories}
+
+
+def get_monthly_totals(user_id: str) -> dict:
+    return {"months": get_transaction_aggregate(user_id)["byMonth"]}
+
+
+def get_daily_trend(user_id: str, days: int = 90) -> dict:
+    return {
+        # Oldest first
+        "series": get_recent_frame(user_id, days).daily(),
+        "totalSpent": get_transaction_aggregate(user_id)["totalExpenses"],
+    }
 
 
 def get_onboarding_fields(user_id: str) -> dict:
-    user_ref = db.collection("users").document(user_id)
-    user_doc = user_ref.get().to_dict() or {}
+    return onboarding_fields_from(get_user_doc(user_id))
+
+
+def onboarding_fields_from(user_doc) -> dict:
+    user_doc = user_doc or {}
     # All fields from onboarding (basic + advanced)
     fields = {
         "gigType": user_doc.get("gigType", ""),
@@ -245,21 +668,28 @@ def get_onboarding_fields(user_id: str) -> dict:
     return fields
 
 
-def save_chat_message(user_id: str, role: str, message: str):
+def save_chat_message(user_id: str, role: str, message: str, timestamp=None):
     return (
         db.collection("users")
         .document(user_id)
         .collection("chats")
-        .add(
-            {
-                "role": role,
-                "message": message,
-                "timestamp": datetime.utcnow(),
-            }
-        )
+        .add(chat_message(role, message, timestamp))
     )
 
 
+def chat_message(role: str, message: str, timestamp=None) -> dict:
+    return {
+        "role": role,
+        "message": message,
+        "timestamp": timestamp or datetime.utcnow(),
+    }
+
+
+def reply_timestamp(asked_at):
+    # Strictly after the user message, so a turn always sorts in order
+    return max(datetime.utcnow(), asked_at + timedelta(milliseconds=1))
+
+
 def get_chat_history(user_id: str):
     docs = (
         db.collection("users")
@@ -270,3 +700,96 @@ def get_chat_history(user_id: str):
     )
 
     return [d.to_dict() for d in docs]
+
+
+def get_recent_chat_history(user_id: str, limit: int = CHAT_HISTORY_WINDOW):
+    """
+    Last `limit` messages, oldest first. Reads only the window instead of
+    the user's whole chat log.
+    """
+    docs = (
+        db.collection("users")
+        .document(user_id)
+        .collection("chats")
+        .order_by("timestamp", direction=firestore.Query.DESCENDING)
+        .limit(limit)
+        .stream()
+    )
+
+    messages = [d.to_dict() for d in docs]
+    messages.reverse()
+    return messages
+
+
+class UnknownChatCursorError(Exception):
+    """The `before` message does not exist (deleted, or another user's id)."""
+
+
+def get_chat_history_page(user_id: str, before: str | None = None, limit: int = 20):
+    """
+    One page of older messages, oldest first.
+    `before` is the id of the oldest message already shown; pass the
+    returned `nextCursor` to keep paging back.
+    """
+    chats_ref = db.collection("users").document(user_id).collection("chats")
+    query = chats_ref.order_by("timestamp", direction=firestore.Query.DESCENDING)
+
+    if before:
+        cursor = chats_ref.document(before).get()
+        # Falling back to the newest page would repeat messages already shown
+        if not cursor.exists:
+            raise UnknownChatCursorError(f"no chat message {before!r}")
+        query = query.start_after(cursor)
+
+    messages = []
+    for doc in query.limit(limit).stream():
+        item = doc.to_dict()
+        item["id"] = doc.id
+        messages.append(item)
+
+    messages.reverse()
+    next_cursor = messages[0]["id"] if len(messages) == limit else None
+
+    return {"messages": messages, "nextCursor": next_cursor}
+
+
+def get_chat_messages_after(user_id: str, after=None, limit: int = None):
+    """
+    Messages with a timestamp after `after` (all if None), oldest first.
+    """
+    query = db.collection("users").document(user_id).collection("chats")
+    if after is not None:
+        query = query.where(filter=firestore.FieldFilter("timestamp", ">", after))
+    query = query.order_by("timestamp")
+    if limit:
+        query = query.limit(limit)
+
+    return [d.to_dict() for d in query.stream()]
+
+
+# Rolling conversation summary, next to the chats it compacts
+def get_chat_memory(user_id: str) -> dict:
+    doc = (
+        db.collection("users")
+        .document(user_id)
+        .collection("chatMemory")
+        .document("summary")
+        .get()
+    )
+    return doc.to_dict() or {}
+
+
+def save_chat_memory(user_id: str, summary: str, covered_until):
+    return (
+        db.collection("users")
+        .document(user_id)
+        .collection("chatMemory")
+        .document("summary")
+        .set(
+            {
+                "summary": summary,
+                "coveredUntil": covered_until,
+                "updatedAt": datetime.utcnow(),
+            }
+        )
+    )
@@ -0,0 +1,241 @@
+# services/fund_catalogue.py
+# Column-oriented, indexed store for the parsed AMFI scheme list
+
+import re
+import zlib
+from bisect import bisect_left
+from functools import lru_cache
+
+import numpy as np
+
+from services.nav_history import METRIC_FIELDS
+
+FUND_FIELDS = ("scheme_code", "scheme_name", "nav", "date", "amc", "category", "risk")
+
+# Parsed feed columns + NAV history metrics
+RECORD_FIELDS = FUND_FIELDS + METRIC_FIELDS
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+SEARCH_CACHE_SIZE = 512
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def _build_index(values):
+    """
+    Inverted index: lowercased value -> sorted int32 array of row ids.
+    """
+    postings = {}
+    for row, value in enumerate(values):
+        postings.setdefault((value or "").lower(), []).append(row)
+
+    return {key: np.asarray(rows, dtype=np.int32) for key, rows in postings.items()}
+
+
+def _union(arrays):
+    if not arrays:
+        return np.empty(0, dtype=np.int32)
+    if len(arrays) == 1:
+        return arrays[0]
+    return np.unique(np.concatenate(arrays))
+
+
+class SchemeSearchIndex:
+    """
+    Token index over scheme names.
+    Every name is split into alphanumeric tokens; a query token matches every
+    vocabulary token containing it (so "cap" finds "Capital" and "Smallcap"),
+    and each token maps to the rows containing it. Prefix hits are a binary
+    search over the sorted vocabulary; infix hits a binary search over the
+    sorted inner suffixes of every token. Results are ranked: names starting
+    with the query, then names containing it verbatim, then token matches;
+    shorter names first within a tier.
+    """
+
+    def __init__(self, names_lower):
+        self.names_lower = names_lower
+
+        postings = {}
+        for row, name in enumerate(names_lower):
+            for token in set(tokenize(name)):
+                postings.setdefault(token, []).append(row)
+
+        self.vocab = sorted(postings)
+        self.postings = [np.asarray(postings[t], dtype=np.int32) for t in self.vocab]
+
+        # Every suffix after the first character, with the token it came from:
+        # tokens containing a query token mid-word are a prefix range here
+        suffixes = sorted(
+            (token[start:], i)
+            for i, token in enumerate(self.vocab)
+            for start in range(1, len(token))
+        )
+        self.suffixes = [suffix for suffix, _ in suffixes]
+        self.suffix_tokens = np.asarray([i for _, i in suffixes], dtype=np.int32)
+
+        # Type-ahead repeats the same prefixes constantly
+        self.search = lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search)
+
+    @staticmethod
+    def _prefix_range(sorted_words, prefix):
+        # Tokens are [a-z0-9], so "{" sorts after every extension of prefix
+        return (
+            bisect_left(sorted_words, prefix),
+            bisect_left(sorted_words, prefix + "{"),
+        )
+
+    def _token_rows(self, token):
+        lo, hi = self._prefix_range(self.vocab, token)
+        matches = set(range(lo, hi))
+
+        lo, hi = self._prefix_range(self.suffixes, token)
+        # A token can contain the query more than once
+        matches.update(self.suffix_tokens[lo:hi].tolist())
+
+        return _union([self.postings[i] for i in sorted(matches)])
+
+    def _search(self, query):
+        needle = query.lower().strip()
+        tokens = tokenize(needle)
+
+        if not tokens:
+            candidates = [
+                row for row, name in enumerate(self.names_lower) if needle in name
+            ]
+        else:
+            per_token = sorted((self._token_rows(t) for t in set(tokens)), key=len)
+            ids = per_token[0]
+            for other in per_token[1:]:
+                if not len(ids):
+                    break
+                ids = np.intersect1d(ids, other, assume_unique=True)
+            candidates = ids.tolist()
+
+        names = self.names_lower
+
+        def rank(row):
+            name = names[row]
+            if name.startswith(needle):
+                tier = 0
+            elif needle in name:
+                tier = 1
+            else:
+                tier = 2
+            return (tier, len(name), row)
+
+        candidates.sort(key=rank)
+        ranked = np.asarray(candidates, dtype=np.int32)
+        ranked.flags.writeable = False
+        return ranked
+
+
+class FundCatalogue:
+    """
+    Parallel column arrays (one per field of a fund record) plus inverted
+    indexes on risk, category and AMC. Filters resolve to sorted arrays of
+    row ids, so only the requested page is ever turned back into dicts.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.size = len(columns["scheme_code"])
+        self.all_ids = np.arange(self.size, dtype=np.int32)
+
+        # Identifies the row order: paging cursors carry it, so a refresh
+        # that adds, drops or reorders schemes is detected, not skipped over
+        codes = "\n".join(str(code) for code in columns["scheme_code"])
+        self.layout_id = f"{zlib.crc32(codes.encode('utf-8')):08x}"
+
+        # Pre-lowercased names for search
+        self.names_lower = [name.lower() for name in columns["scheme_name"]]
+
+        self.risk_index = _build_index(columns["risk"])
+        self.category_index = _build_index(columns["category"])
+        self.amc_index = _build_index(columns["amc"])
+
+        self.search_index = SchemeSearchIndex(self.names_lower)
+
+        # Per-row NAV history metrics (float arrays, NaN when unknown)
+        self.metrics = {}
+
+    @classmethod
+    def from_records(cls, records):
+        columns = {field: [] for field in FUND_FIELDS}
+        for record in records:
+            for field in FUND_FIELDS:
+                columns[field].append(record.get(field))
+        return cls(columns)
+
+    def __len__(self):
+        return self.size
+
+    # ----------------------------
+    # Materialization
+    # ----------------------------
+    def attach_metrics(self, metrics):
+        self.metrics = metrics
+
+    def _value(self, field, row):
+        column = self.columns.get(field)
+        if column is not None:
+            return column[row]
+
+        values = self.metrics.get(field)
+        if values is None or np.isnan(values[row]):
+            return None
+        return round(float(values[row]), 4)
+
+    def record(self, row, fields=RECORD_FIELDS):
+        return {field: self._value(field, row) for field in fields}
+
+    def records(self, ids, fields=RECORD_FIELDS):
+        return [self.record(int(row), fields) for row in ids]
+
+    def to_records(self, fields=RECORD_FIELDS):
+        return self.records(self.all_ids, fields)
+
+    # ----------------------------
+    # Index lookups
+    # ----------------------------
+    def _exact(self, index, value):
+        return index.get(value.lower(), np.empty(0, dtype=np.int32))
+
+    def _contains(self, index, value):
+        # Few distinct categories/AMCs, so matching keys is cheap
+        needle = value.lower()
+        return _union([ids for key, ids in index.items() if needle in key])
+
+    def filter_ids(self, risk=None, category=None, amc=None):
+        """
+        Returns the sorted row ids matching every given filter.
+        `risk` is an exact match, `category` and `amc` are substring matches.
+        """
+        selected = []
+
+        if risk:
+            selected.append(self._exact(self.risk_index, risk))
+        if category:
+            selected.append(self._contains(self.category_index, category))
+        if amc:
+            selected.append(self._contains(self.amc_index, amc))
+
+        if not selected:
+            return self.all_ids
+
+        # Intersect smallest first so each step shrinks quickly
+        selected.sort(key=len)
+        ids = selected[0]
+        for other in selected[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+
+    def search_ids(self, query, ids=None):
+        """
+        Ranked row ids for `query`, optionally restricted to `ids`.
+        """
+        ranked = self.search_index.search(query)
+        if ids is None or len(ids) == self.size:
+            return ranked
+        return ranked[np.isin(ranked, ids, assume_unique=True)]
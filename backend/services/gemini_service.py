@@ -1,28 +1,155 @@
 # services/gemini_service.py
+import asyncio
 import os
+import threading
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+from services.prompt_cache import create_prompt_cache, prompt_key
+
 load_dotenv()
 
 # Configure Gemini
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 MODEL_NAME = "models/gemini-2.5-flash"
 
+# Hung LLM calls must not pin uvicorn threadpool workers forever
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+# Max in-flight Gemini calls per process, and how long a caller may queue
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", "10"))
+
+# One model (and its underlying gRPC channel) shared by every request
+_model = genai.GenerativeModel(MODEL_NAME)
+_gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+# Event-loop side limit for the async path
+_gemini_async_slots = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+# Responses for deterministic prompts, keyed by model + normalized prompt
+prompt_cache = create_prompt_cache()
+ADVICE_CACHE_TTL = 6 * 60 * 60
+
+
+class GeminiBusyError(Exception):
+    pass
+
+
+def generate(prompt: str):
+    """
+    Run one generate_content call on the shared model, bounded by the
+    concurrency semaphore and the per-call timeout.
+    """
+    if not _gemini_slots.acquire(timeout=GEMINI_QUEUE_TIMEOUT):
+        raise GeminiBusyError("Too many concurrent Gemini calls")
+
+    try:
+        return _model.generate_content(
+            prompt, request_options={"timeout": GEMINI_TIMEOUT}
+        )
+    finally:
+        _gemini_slots.release()
+
+
+async def generate_async(prompt: str):
+    """
+    Async twin of generate(): awaits the SDK's async client so in-flight
+    calls cost no threadpool worker.
+    """
+    try:
+        await asyncio.wait_for(
+            _gemini_async_slots.acquire(), timeout=GEMINI_QUEUE_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        raise GeminiBusyError("Too many concurrent Gemini calls")
+
+    try:
+        return await asyncio.wait_for(
+            _model.generate_content_async(
+                prompt, request_options={"timeout": GEMINI_TIMEOUT}
+            ),
+            timeout=GEMINI_TIMEOUT,
+        )
+    finally:
+        _gemini_async_slots.release()
+
+
+async def stream_gemini_async(prompt: str):
+    """
+    Async generator over text chunks as Gemini produces them. Holds one
+    concurrency slot for the whole stream. Yields the usual fallback text
+    if the call fails before producing anything.
+    """
+    try:
+        await asyncio.wait_for(
+            _gemini_async_slots.acquire(), timeout=GEMINI_QUEUE_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        print("Gemini Error: Too many concurrent Gemini calls")
+        yield "AI tip unavailable right now."
+        return
+
+    produced = False
+    try:
+        response = await _model.generate_content_async(
+            prompt, stream=True, request_options={"timeout": GEMINI_TIMEOUT}
+        )
+        async for chunk in response:
+            text = getattr(chunk, "text", None)
+            if text:
+                produced = True
+                yield text
+    except Exception as e:
+        print("Gemini Stream Error:", e)
+        if not produced:
+            yield "AI tip unavailable right now."
+    finally:
+        _gemini_async_slots.release()
+
+
+def _response_text(response):
+    # Some responses might not have .text (Gemini API quirk)
+    text = getattr(response, "text", None)
+    return text.strip() if text and text.strip() else None
+
+
+def _response_json_text(response):
+    # Correct extraction for Gemini 2.5 JSON output
+    if (
+        hasattr(response, "candidates")
+        and response.candidates
+        and hasattr(response.candidates[0], "content")
+    ):
+        parts = response.candidates[0].content.parts
+        if parts:
+            text = "".join(
+                getattr(part, "text", "") for part in parts if hasattr(part, "text")
+            )
+            return text.strip()
+
+    return ""
+
 
 # -----------------------------
 # 🔵 Shared Gemini Caller
 # -----------------------------
-def call_gemini(prompt: str) -> str:
-    try:
-        model = genai.GenerativeModel(MODEL_NAME)
-        response = model.generate_content(prompt)
+def call_gemini(prompt: str, cache_ttl: float | None = None) -> str:
+    """
+    `cache_ttl` (seconds) opts the caller into the prompt cache; only real
+    responses are cached, never the fallbacks.
+    """
+    key = prompt_key(MODEL_NAME, prompt) if cache_ttl else None
+    if key:
+        cached = prompt_cache.get(key)
+        if cached is not None:
+            return cached
 
-        # Some responses might not have .text (Gemini API quirk)
-        text = getattr(response, "text", None)
+    try:
+        text = _response_text(generate(prompt))
 
-        if text and text.strip():
-            return text.strip()
+        if text:
+            if key:
+                prompt_cache.set(key, text, cache_ttl)
+            return text
 
         # fallback
         return "No response generated."
@@ -32,9 +159,31 @@ def call_gemini(prompt: str) -> str:
         return "AI tip unavailable right now."
 
 
+async def call_gemini_async(prompt: str, cache_ttl: float | None = None) -> str:
+    key = prompt_key(MODEL_NAME, prompt) if cache_ttl else None
+    if key:
+        cached = prompt_cache.get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        text = _response_text(await generate_async(prompt))
+
+        if text:
+            if key:
+                prompt_cache.set(key, text, cache_ttl)
+            return text
+
+        return "No response generated."
+
+    except Exception as e:
+        print("Gemini Error:", e)
+        return "AI tip unavailable right now."
+
+
 # -----------------------------
-def generate_advice(summary: dict):
-    prompt = f"""
+def advice_prompt(summary: dict):
+    return f"""
 You are a financial advisor AI. The user gives their financial summary.
 
 User Summary:
@@ -50,31 +199,49 @@ TASK:
 - Keep each tip to 1 sentence.
 """
 
-    return call_gemini(prompt)
+
+def generate_advice(summary: dict):
+    return call_gemini(advice_prompt(summary), cache_ttl=ADVICE_CACHE_TTL)
+
+
+async def generate_advice_async(summary: dict):
+    return await call_gemini_async(advice_prompt(summary), cache_ttl=ADVICE_CACHE_TTL)
 
 
 # -------------------------------------
 # 🔵 Custom Gemini JSON Caller (safe)
 # -------------------------------------
-def call_gemini_json(prompt: str) -> str:
+def call_gemini_json(prompt: str, cache_ttl: float | None = None) -> str:
+    # Separate key space: the JSON caller extracts text differently
+    key = prompt_key(f"{MODEL_NAME}:json", prompt) if cache_ttl else None
+    if key:
+        cached = prompt_cache.get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        text = _response_json_text(generate(prompt))
+        if key and text:
+            prompt_cache.set(key, text, cache_ttl)
+        return text  # empty triggers fallback in DreamPlanner
+
+    except Exception as e:
+        print("Gemini JSON Error:", e)
+        return ""
+
+
+async def call_gemini_json_async(prompt: str, cache_ttl: float | None = None) -> str:
+    key = prompt_key(f"{MODEL_NAME}:json", prompt) if cache_ttl else None
+    if key:
+        cached = prompt_cache.get(key)
+        if cached is not None:
+            return cached
+
     try:
-        model = genai.GenerativeModel(MODEL_NAME)
-        response = model.generate_content(prompt)
-
-        # Correct extraction for Gemini 2.5 JSON output
-        if (
-            hasattr(response, "candidates")
-            and response.candidates
-            and hasattr(response.candidates[0], "content")
-        ):
-            parts = response.candidates[0].content.parts
-            if parts:
-                text = "".join(
-                    getattr(part, "text", "") for part in parts if hasattr(part, "text")
-                )
-                return text.strip()
-
-        return ""  # return empty to trigger fallback in DreamPlanner
+        text = _response_json_text(await generate_async(prompt))
+        if key and text:
+            prompt_cache.set(key, text, cache_ttl)
+        return text
 
     except Exception as e:
         print("Gemini JSON Error:", e)
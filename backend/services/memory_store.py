@@ -0,0 +1,497 @@
+# services/memory_store.py
+# In-memory implementation of the Firestore client subset the services use
+# (sync + AsyncClient), optionally persisted to SQLite. Selected through
+# services/storage.py.
+
+import copy
+import functools
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+
+DESCENDING = "DESCENDING"
+DOCUMENT_ID = "__name__"
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array-contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+_MISSING = object()
+
+
+def _deep_merge(target, data):
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+
+def _field(data, path):
+    value = data
+    for part in str(path).split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__}")
+
+
+def _decode(obj):
+    if set(obj) == {"$datetime"}:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+class SqliteDocumentStore:
+    """
+    Write-through copy of every document, loaded back on startup only, so
+    the file must belong to a single server process: a second one would
+    keep its own in-memory copy and never see the first one's writes.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " path TEXT PRIMARY KEY, data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self):
+        for path, data in self._conn.execute("SELECT path, data FROM documents"):
+            yield tuple(path.split("/")), json.loads(data, object_hook=_decode)
+
+    def save(self, documents):
+        # documents: [(path, data or None for deleted)], one SQLite transaction
+        for path, data in documents:
+            key = "/".join(path)
+            if data is None:
+                self._conn.execute("DELETE FROM documents WHERE path = ?", (key,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents VALUES (?, ?)",
+                    (key, json.dumps(data, default=_encode)),
+                )
+        self._conn.commit()
+
+
+class MemoryStore:
+    """
+    Documents as {collection path: {doc id: data}}. One lock serializes
+    writes; reads copy under it so callers never share mutable state.
+    With `persist_path`, every write also goes to SQLite.
+    """
+
+    def __init__(self, persist_path=None):
+        self.lock = threading.RLock()
+        self.collections = {}
+        self.persisted = SqliteDocumentStore(persist_path) if persist_path else None
+
+        if self.persisted:
+            for path, data in self.persisted.load():
+                self.collections.setdefault(path[:-1], {})[path[-1]] = data
+
+    def read(self, path):
+        with self.lock:
+            data = self.collections.get(path[:-1], {}).get(path[-1])
+            return copy.deepcopy(data)
+
+    def write(self, path, data, merge=False):
+        self.apply([("set", path, data, merge)])
+
+    def update(self, path, data):
+        self.apply([("update", path, data, None)])
+
+    def delete(self, path):
+        self.apply([("delete", path, None, None)])
+
+    def apply(self, writes):
+        """
+        [(kind, path, data, merge)] applied atomically, then persisted.
+        """
+        with self.lock:
+            for kind, path, data, merge in writes:
+                if kind == "set":
+                    self._set(path, data, merge)
+                elif kind == "update":
+                    self._update(path, data)
+                else:
+                    self.collections.get(path[:-1], {}).pop(path[-1], None)
+
+            if self.persisted:
+                paths = dict.fromkeys(path for _, path, _, _ in writes)
+                self.persisted.save(
+                    [
+                        (path, self.collections.get(path[:-1], {}).get(path[-1]))
+                        for path in paths
+                    ]
+                )
+
+    def _set(self, path, data, merge):
+        docs = self.collections.setdefault(path[:-1], {})
+        if merge and path[-1] in docs:
+            _deep_merge(docs[path[-1]], data)
+        else:
+            docs[path[-1]] = copy.deepcopy(data)
+
+    def _update(self, path, data):
+        current = self.collections.get(path[:-1], {}).get(path[-1])
+        if current is None:
+            raise KeyError(f"No document to update: {'/'.join(path)}")
+        for key, value in data.items():
+            target = current
+            *parents, leaf = key.split(".")
+            for part in parents:
+                target = target.setdefault(part, {})
+            target[leaf] = copy.deepcopy(value)
+
+    def list(self, collection_path):
+        with self.lock:
+            return [
+                (doc_id, copy.deepcopy(data))
+                for doc_id, data in self.collections.get(collection_path, {}).items()
+            ]
+
+
+# ----------------------------------------------------------------------------
+# Sync client
+# ----------------------------------------------------------------------------
+class DocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return self._data
+
+    def get(self, field_path):
+        value = _field(self._data or {}, field_path)
+        return None if value is _MISSING else value
+
+
+class DocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self._path = path
+        self.id = path[-1]
+
+    @property
+    def path(self):
+        return "/".join(self._path)
+
+    def collection(self, name):
+        return CollectionReference(self._client, self._path + (name,))
+
+    def get(self, field_paths=None, transaction=None):
+        return DocumentSnapshot(self, self._client.store.read(self._path))
+
+    def set(self, document_data, merge=False):
+        self._client.store.write(self._path, document_data, merge)
+
+    def update(self, field_updates):
+        self._client.store.update(self._path, field_updates)
+
+    def delete(self):
+        self._client.store.delete(self._path)
+
+
+class Query:
+    def __init__(
+        self, parent, filters=(), orders=(), limit=None, cursor=None, fields=None
+    ):
+        self._parent = parent
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._cursor = cursor
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = dict(
+            filters=self._filters,
+            orders=self._orders,
+            limit=self._limit,
+            cursor=self._cursor,
+            fields=self._fields,
+        )
+        state.update(changes)
+        return self._query_class(self._parent, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = (
+                filter.field_path,
+                filter.op_string,
+                filter.value,
+            )
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, snapshot):
+        return self._copy(cursor=snapshot)
+
+    def select(self, field_paths):
+        return self._copy(fields=tuple(field_paths))
+
+    # ----------------------------
+    # Evaluation
+    # ----------------------------
+    @staticmethod
+    def _value(doc_id, data, field_path):
+        if str(field_path) == DOCUMENT_ID:
+            return doc_id
+        return _field(data, field_path)
+
+    def _matches(self, doc_id, data):
+        for field_path, op, value in self._filters:
+            if str(field_path) == DOCUMENT_ID and hasattr(value, "id"):
+                value = value.id
+            actual = self._value(doc_id, data, field_path)
+            if actual is _MISSING or not _OPS[op](actual, value):
+                return False
+        return True
+
+    def _compare(self, a, b):
+        # Explicit orderings, then document ID (Firestore's implicit last key)
+        for field_path, direction in self._orders + ((DOCUMENT_ID, None),):
+            left = self._value(a[0], a[1], field_path)
+            right = self._value(b[0], b[1], field_path)
+            if left == right:
+                continue
+            result = -1 if left < right else 1
+            return -result if direction == DESCENDING else result
+        return 0
+
+    def _documents(self):
+        docs = [
+            (doc_id, data)
+            for doc_id, data in self._parent._client.store.list(self._parent._path)
+            if self._matches(doc_id, data)
+        ]
+        docs = [
+            doc
+            for doc in docs
+            if all(self._value(*doc, f) is not _MISSING for f, _ in self._orders)
+        ]
+        docs.sort(key=functools.cmp_to_key(self._compare))
+
+        if self._cursor is not None:
+            # Cursors are snapshots (the only form the backend passes)
+            cursor = (self._cursor.id, self._cursor.to_dict() or {})
+            docs = [doc for doc in docs if self._compare(doc, cursor) > 0]
+
+        if self._limit is not None:
+            docs = docs[: self._limit]
+        return docs
+
+    def _snapshot(self, doc_id, data):
+        if self._fields:
+            projected = {}
+            for field_path in self._fields:
+                value = _field(data, field_path)
+                if value is not _MISSING:
+                    projected[field_path] = value
+            data = projected
+        return DocumentSnapshot(self._parent.document(doc_id), data)
+
+    def stream(self, transaction=None):
+        for doc_id, data in self._documents():
+            yield self._snapshot(doc_id, data)
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+
+Query._query_class = Query
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path):
+        self._client = client
+        self._path = path
+        self.id = path[-1]
+        super().__init__(self)
+
+    def document(self, document_id=None):
+        return DocumentReference(
+            self._client, self._path + (document_id or uuid.uuid4().hex[:20],)
+        )
+
+    def add(self, document_data, document_id=None):
+        ref = self.document(document_id)
+        ref.set(document_data)
+        return datetime.now(timezone.utc), ref
+
+
+class WriteBatch:
+    """
+    Writes buffered until commit(), then applied under the store lock.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(("set", reference._path, document_data, merge))
+
+    def update(self, reference, field_updates):
+        self._writes.append(("update", reference._path, field_updates, None))
+
+    def delete(self, reference):
+        self._writes.append(("delete", reference._path, None, None))
+
+    def commit(self):
+        self._client.store.apply(self._writes)
+        self._writes = []
+        return []
+
+
+class Transaction(WriteBatch):
+    pass
+
+
+class Client:
+    def __init__(self, store=None):
+        self.store = store or MemoryStore()
+
+    def collection(self, name):
+        return CollectionReference(self, (name,))
+
+    def document(self, path):
+        return DocumentReference(self, tuple(path.split("/")))
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def transaction(self):
+        return Transaction(self)
+
+
+def transactional(fn):
+    """
+    firestore.transactional for the in-memory client: the whole function
+    runs under the store lock, so reads and buffered writes are atomic.
+    """
+
+    @functools.wraps(fn)
+    def run(transaction, *args, **kwargs):
+        with transaction._client.store.lock:
+            result = fn(transaction, *args, **kwargs)
+            transaction.commit()
+        return result
+
+    return run
+
+
+def async_transactional(fn):
+    """
+    firestore.async_transactional for the in-memory client. The store's
+    awaitables complete without yielding to the event loop, so holding the
+    lock across them keeps the same atomicity as transactional.
+    """
+
+    @functools.wraps(fn)
+    async def run(transaction, *args, **kwargs):
+        with transaction._client.store.lock:
+            result = await fn(transaction, *args, **kwargs)
+            transaction.commit()
+        return result
+
+    return run
+
+
+# ----------------------------------------------------------------------------
+# AsyncClient: same store, awaitable surface
+# ----------------------------------------------------------------------------
+async def _resolved(value):
+    return value
+
+
+class AsyncDocumentReference(DocumentReference):
+    def collection(self, name):
+        return AsyncCollectionReference(self._client, self._path + (name,))
+
+    def get(self, field_paths=None, transaction=None):
+        return _resolved(super().get())
+
+    def set(self, document_data, merge=False):
+        return _resolved(super().set(document_data, merge))
+
+    def update(self, field_updates):
+        return _resolved(super().update(field_updates))
+
+    def delete(self):
+        return _resolved(super().delete())
+
+
+class AsyncQuery(Query):
+    async def stream(self, transaction=None):
+        for snapshot in super().stream():
+            yield snapshot
+
+    async def get(self, transaction=None):
+        return [snapshot async for snapshot in self.stream()]
+
+
+AsyncQuery._query_class = AsyncQuery
+
+
+class AsyncCollectionReference(AsyncQuery, CollectionReference):
+    def document(self, document_id=None):
+        return AsyncDocumentReference(
+            self._client, self._path + (document_id or uuid.uuid4().hex[:20],)
+        )
+
+    async def add(self, document_data, document_id=None):
+        ref = self.document(document_id)
+        await ref.set(document_data)
+        return datetime.now(timezone.utc), ref
+
+
+class AsyncWriteBatch(WriteBatch):
+    async def commit(self):
+        return super().commit()
+
+
+class AsyncClient(Client):
+    def collection(self, name):
+        return AsyncCollectionReference(self, (name,))
+
+    def document(self, path):
+        return AsyncDocumentReference(self, tuple(path.split("/")))
+
+    def batch(self):
+        return AsyncWriteBatch(self)
@@ -1,7 +1,36 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import msgpack
 import requests
 
+from services.fund_catalogue import RECORD_FIELDS, FundCatalogue
+from services.nav_history import NavHistoryStore
+
 AMFI_URL = "https://www.amfiindia.com/spages/NAVAll.txt"
 
+# AMFI publishes NAVAll.txt once a day after fund houses report (late evening
+# IST), so a parsed snapshot stays valid until the next publish cutoff. Some
+# NAVs post after it, so from the cutoff until the morning the feed is
+# re-validated hourly (an unchanged feed is only a 304).
+IST = timezone(timedelta(hours=5, minutes=30))
+AMFI_PUBLISH_HOUR_IST = 23
+AMFI_LATE_NAV_UNTIL_HOUR_IST = 6
+AMFI_LATE_REVALIDATE_SECONDS = 3600
+AMFI_FETCH_TIMEOUT = 30
+REFRESH_RETRY_SECONDS = 300
+
+# Last parsed snapshot, shared by restarts and sibling uvicorn workers
+AMFI_CACHE_PATH = os.getenv("AMFI_CACHE_PATH", "cache/amfi_snapshot.msgpack")
+AMFI_CACHE_VERSION = 1
+
+NDJSON_BATCH_SIZE = 500
+
+nav_history = NavHistoryStore()
+
 
 #  Risk classifier
 def classify_risk(category: str):
@@ -46,21 +75,17 @@ def infer_category_from_name(name: str):
     return "Other"
 
 
-#  Fetch + parse AMFI data correctly
-def fetch_amfi_data():
-    response = requests.get(AMFI_URL)
-
-    if response.status_code != 200:
-        raise Exception("Failed to fetch AMFI data")
-
-    lines = response.text.splitlines()
-
-    funds = []
+#  Parse NAVAll.txt lines (any iterable: HTTP body, open fixture file, ...)
+def parse_amfi_lines(lines):
+    """
+    Generator over scheme records. Keeps only the current AMC/category
+    between lines, so the feed never has to be held in memory.
+    """
     current_amc = None
     current_category = None
 
     for line in lines:
-        parts = line.split(";")
+        parts = line.rstrip("\r\n").split(";")
 
         #  AMC (fund house)
         if len(parts) == 1 and parts[0].strip() != "":
@@ -78,39 +103,415 @@ def fetch_amfi_data():
             scheme_name = parts[3]
             category = current_category or infer_category_from_name(scheme_name)
 
-            funds.append(
-                {
-                    "scheme_code": parts[0],
-                    "scheme_name": scheme_name,
-                    "nav": parts[4],
-                    "date": parts[5],
-                    "amc": current_amc,
-                    "category": category,
-                    "risk": classify_risk(category),
-                }
+            yield {
+                "scheme_code": parts[0],
+                "scheme_name": scheme_name,
+                "nav": parts[4],
+                "date": parts[5],
+                "amc": current_amc,
+                "category": category,
+                "risk": classify_risk(category),
+            }
+
+
+#  Open the AMFI feed (conditional when validators are given)
+def open_amfi_feed(etag=None, last_modified=None):
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    response = requests.get(
+        AMFI_URL, headers=headers, stream=True, timeout=AMFI_FETCH_TIMEOUT
+    )
+
+    if response.status_code not in (200, 304):
+        response.close()
+        raise Exception("Failed to fetch AMFI data")
+
+    # NAVAll.txt is served without a charset
+    response.encoding = response.encoding or "utf-8"
+    return response
+
+
+#  Stream + parse AMFI data
+def iter_amfi_data():
+    with open_amfi_feed() as response:
+        yield from parse_amfi_lines(response.iter_lines(decode_unicode=True))
+
+
+def fetch_amfi_data():
+    return list(iter_amfi_data())
+
+
+# ----------------------------
+# Shared AMFI snapshot (stale-while-revalidate)
+# ----------------------------
+class AmfiSnapshot:
+    def __init__(
+        self, catalogue, fetched_at, expires_at, etag=None, last_modified=None
+    ):
+        self.catalogue = catalogue
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_stale(self, now=None):
+        return (now or time.time()) >= self.expires_at
+
+    def with_expiry(self, fetched_at, expires_at):
+        return AmfiSnapshot(
+            self.catalogue, fetched_at, expires_at, self.etag, self.last_modified
+        )
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_refresher_started = False
+
+
+def _next_hour_ist(current, hour):
+    at = current.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if at <= current:
+        at += timedelta(days=1)
+    return at
+
+
+def next_refresh_at(now=None):
+    """
+    Unix time at which a snapshot fetched at `now` should be re-validated:
+    the next AMFI publish cutoff, or an hour later inside the late-NAV window.
+    """
+    now = now or time.time()
+    current = datetime.fromtimestamp(now, IST)
+
+    if (
+        current.hour >= AMFI_PUBLISH_HOUR_IST
+        or current.hour < AMFI_LATE_NAV_UNTIL_HOUR_IST
+    ):
+        window_end = _next_hour_ist(current, AMFI_LATE_NAV_UNTIL_HOUR_IST)
+        return min(now + AMFI_LATE_REVALIDATE_SECONDS, window_end.timestamp())
+
+    return _next_hour_ist(current, AMFI_PUBLISH_HOUR_IST).timestamp()
+
+
+# ----------------------------
+# On-disk snapshot (msgpack)
+# ----------------------------
+def save_snapshot_to_disk(snapshot, path=None):
+    path = path or AMFI_CACHE_PATH
+    payload = {
+        "version": AMFI_CACHE_VERSION,
+        "fetched_at": snapshot.fetched_at,
+        "etag": snapshot.etag,
+        "last_modified": snapshot.last_modified,
+        "columns": snapshot.catalogue.columns,
+    }
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Write + rename so concurrent workers never read a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        msgpack.pack(payload, f)
+    os.replace(tmp_path, path)
+
+
+# ----------------------------
+# NAV history
+# ----------------------------
+def attach_nav_history(catalogue, record=False):
+    """
+    Optionally append the catalogue's NAVs to the history store, then attach
+    per-scheme return/volatility/drawdown metrics. Never fails a refresh.
+    """
+    codes = catalogue.columns["scheme_code"]
+    try:
+        if record:
+            nav_history.append_snapshot(
+                codes, catalogue.columns["nav"], catalogue.columns["date"]
             )
+        catalogue.attach_metrics(nav_history.metrics_for(codes))
+    except Exception as e:
+        print("NAV history unavailable:", e)
+
+
+def load_snapshot_from_disk(path=None):
+    path = path or AMFI_CACHE_PATH
+    try:
+        with open(path, "rb") as f:
+            payload = msgpack.unpack(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print("Ignoring unreadable AMFI cache:", e)
+        return None
+
+    if payload.get("version") != AMFI_CACHE_VERSION:
+        return None
+
+    fetched_at = payload["fetched_at"]
+    catalogue = FundCatalogue(payload["columns"])
+    attach_nav_history(catalogue)
+
+    return AmfiSnapshot(
+        catalogue,
+        fetched_at,
+        next_refresh_at(fetched_at),
+        payload.get("etag"),
+        payload.get("last_modified"),
+    )
+
+
+def refresh_amfi_snapshot():
+    """
+    Re-validate NAVAll.txt and atomically swap the shared snapshot.
+    Uses the previous ETag/Last-Modified, so an unchanged feed is a 304 and
+    is not re-parsed. Concurrent callers share a single download.
+    """
+    global _snapshot
+
+    with _refresh_lock:
+        # Another thread may have refreshed while we waited for the lock
+        current = _snapshot
+        if current is not None and not current.is_stale():
+            return current
+
+        try:
+            fresh = _download_snapshot(current)
+        except Exception:
+            # Keep serving the old data and back off instead of letting every
+            # request retry the download
+            if current is not None:
+                retry_at = time.time() + REFRESH_RETRY_SECONDS
+                with _snapshot_lock:
+                    _snapshot = current.with_expiry(current.fetched_at, retry_at)
+            raise
+
+        with _snapshot_lock:
+            _snapshot = fresh
+
+        return fresh
+
+
+def _download_snapshot(current):
+    etag = current.etag if current else None
+    last_modified = current.last_modified if current else None
+    now = time.time()
+
+    with open_amfi_feed(etag, last_modified) as response:
+        if response.status_code == 304 and current is not None:
+            return current.with_expiry(now, next_refresh_at(now))
+
+        catalogue = FundCatalogue.from_records(
+            parse_amfi_lines(response.iter_lines(decode_unicode=True))
+        )
+        attach_nav_history(catalogue, record=True)
+        fresh = AmfiSnapshot(
+            catalogue,
+            now,
+            next_refresh_at(now),
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+
+    try:
+        save_snapshot_to_disk(fresh)
+    except Exception as e:
+        print("Could not persist AMFI snapshot:", e)
+
+    return fresh
+
+
+def _load_initial_snapshot():
+    """
+    Cold start: adopt the on-disk snapshot if there is one (even if stale,
+    the background refresh re-validates it), else download.
+    """
+    global _snapshot
+
+    with _refresh_lock:
+        if _snapshot is None:
+            loaded = load_snapshot_from_disk()
+            if loaded is not None:
+                with _snapshot_lock:
+                    if _snapshot is None:
+                        _snapshot = loaded
+
+    if _snapshot is None:
+        return refresh_amfi_snapshot()
+
+    return _snapshot
+
+
+def _refresh_in_background():
+    if _refresh_lock.locked():
+        return
+
+    def run():
+        try:
+            refresh_amfi_snapshot()
+        except Exception as e:
+            print("AMFI refresh failed, serving stale snapshot:", e)
+
+    threading.Thread(target=run, name="amfi-refresh", daemon=True).start()
+
+
+def get_amfi_snapshot():
+    """
+    Returns the shared parsed AMFI snapshot.
+    Only the very first call (cold process) waits on the download; after that
+    a stale snapshot is served while a background refresh runs.
+    """
+    current = _snapshot
+
+    if current is None:
+        current = _load_initial_snapshot()
+
+    if current.is_stale():
+        _refresh_in_background()
+
+    return current
+
+
+def _refresher_loop():
+    try:
+        _load_initial_snapshot()
+    except Exception as e:
+        print("AMFI warm-up failed, retrying later:", e)
 
-    return funds
+    while True:
+        current = _snapshot
+        wait = current.expires_at - time.time() if current else 0
 
+        if wait > 0:
+            time.sleep(wait)
+            continue
 
-#  Filtering + pagination
-def get_filtered_funds(page=1, limit=50, risk=None, category=None, search=None):
-    data = fetch_amfi_data()
+        try:
+            refresh_amfi_snapshot()
+        except Exception as e:
+            print("AMFI refresh failed, retrying later:", e)
+            if _snapshot is None:
+                time.sleep(REFRESH_RETRY_SECONDS)
+
+
+def start_amfi_refresher():
+    """
+    Start the daemon thread that keeps the snapshot warm across publishes.
+    Safe to call more than once.
+    """
+    global _refresher_started
+
+    with _snapshot_lock:
+        if _refresher_started:
+            return
+        _refresher_started = True
+
+    threading.Thread(target=_refresher_loop, name="amfi-refresher", daemon=True).start()
+
+
+def parse_fields(fields):
+    """
+    "scheme_code,nav" -> ("scheme_code", "nav"); None -> every field.
+    """
+    if not fields:
+        return RECORD_FIELDS
+
+    selected = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = [f for f in selected if f not in RECORD_FIELDS]
+    if unknown or not selected:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return selected
+
+
+def get_cached_funds(fields=RECORD_FIELDS):
+    return get_amfi_snapshot().catalogue.to_records(fields)
+
+
+#  Cursor pagination over the whole catalogue
+class StaleCursorError(Exception):
+    pass
+
+
+def _page_cursor(catalogue, offset):
+    # "<row offset>.<layout id>": only valid against the same scheme list
+    if offset >= len(catalogue):
+        return None
+    return f"{offset}.{catalogue.layout_id}"
+
+
+def _cursor_offset(catalogue, cursor):
+    if not cursor or cursor == "0":
+        return 0
 
-    if risk:
-        data = [f for f in data if f["risk"].lower() == risk.lower()]
+    offset, _, layout_id = cursor.partition(".")
+    if not offset.isdigit() or not layout_id:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if layout_id != catalogue.layout_id:
+        raise StaleCursorError(
+            "The fund list changed since this cursor was issued; "
+            "restart from the first page"
+        )
+    return int(offset)
+
+
+def get_funds_page(cursor=None, limit=500, fields=RECORD_FIELDS):
+    catalogue = get_amfi_snapshot().catalogue
+
+    start = _cursor_offset(catalogue, cursor)
+    end = min(start + limit, len(catalogue))
+
+    return {
+        "total": len(catalogue),
+        "cursor": cursor,
+        "nextCursor": _page_cursor(catalogue, end),
+        "results": catalogue.records(range(start, end), fields),
+    }
+
+
+#  NDJSON stream (one record per line), written in batches
+def stream_funds_ndjson(fields=RECORD_FIELDS, cursor=None, limit=None):
+    """
+    Returns (batches, next cursor). The cursor is checked here, before
+    anything is streamed.
+    """
+    # Pin the snapshot so a refresh mid-stream cannot mix two feeds
+    catalogue = get_amfi_snapshot().catalogue
+
+    start = _cursor_offset(catalogue, cursor)
+    end = len(catalogue) if limit is None else min(start + limit, len(catalogue))
+
+    return _ndjson_batches(catalogue, fields, start, end), _page_cursor(catalogue, end)
+
+
+def _ndjson_batches(catalogue, fields, start, end):
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    for offset in range(start, end, NDJSON_BATCH_SIZE):
+        rows = range(offset, min(offset + NDJSON_BATCH_SIZE, end))
+        batch = "".join(dumps(catalogue.record(row, fields)) + "\n" for row in rows)
+        yield batch.encode("utf-8")
+
+
+#  Filtering + pagination
+def get_filtered_funds(
+    page=1, limit=50, risk=None, category=None, search=None, amc=None
+):
+    catalogue = get_amfi_snapshot().catalogue
 
-    if category:
-        data = [
-            f
-            for f in data
-            if f["category"] and category.lower() in f["category"].lower()
-        ]
+    ids = catalogue.filter_ids(risk=risk, category=category, amc=amc)
 
     if search:
-        data = [f for f in data if search.lower() in f["scheme_name"].lower()]
+        ids = catalogue.search_ids(search, ids)
 
-    total = len(data)
+    total = len(ids)
     start = (page - 1) * limit
     end = start + limit
 
@@ -118,5 +519,5 @@ def get_filtered_funds(page=1, limit=50, risk=None, category=None, search=None):
         "total": total,
         "page": page,
         "limit": limit,
-        "results": data[start:end],
+        "results": catalogue.records(ids[start:end]),
     }
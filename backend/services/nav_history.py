@@ -0,0 +1,294 @@
+# services/nav_history.py
+# Daily NAV history for every AMFI scheme + vectorized return metrics
+
+import json
+import os
+import threading
+import warnings
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: single worker, no file lock
+    fcntl = None
+
+NAV_HISTORY_DIR = os.getenv("NAV_HISTORY_DIR", "cache/nav_history")
+
+INITIAL_DAYS = 64
+INITIAL_SCHEMES = 16384
+TRADING_DAYS_PER_YEAR = 252
+
+# Look-back windows in calendar days
+WINDOW_1M = 30
+WINDOW_1Y = 365
+WINDOW_3Y = 3 * 365
+
+METRIC_FIELDS = ("return_1m", "cagr_1y", "cagr_3y", "volatility_1y", "max_drawdown")
+
+
+def parse_amfi_date(value):
+    try:
+        return datetime.strptime(value, "%d-%b-%Y").toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_nav(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class NavHistoryStore:
+    """
+    On-disk NAV matrix: one row per day, one column (slot) per scheme_code.
+
+    cache/nav_history/
+        meta.json   {"days": n, "codes": [scheme_code per slot]}
+        dates.npy   int32 day ordinals, memory-mapped
+        navs.npy    float32 [days x slots], NaN where no NAV was published
+
+    Both arrays are preallocated and grown by doubling, so appending a day
+    writes one row in place through the memory map.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or NAV_HISTORY_DIR
+        self.meta_path = os.path.join(self.directory, "meta.json")
+        self.dates_path = os.path.join(self.directory, "dates.npy")
+        self.navs_path = os.path.join(self.directory, "navs.npy")
+        self._lock = threading.Lock()
+
+    # ----------------------------
+    # Files
+    # ----------------------------
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(os.path.join(self.directory, ".lock"), "w") as f:
+            # Sibling uvicorn workers refresh the same store
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_meta(self):
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"days": 0, "codes": []}
+
+    def _save_meta(self, meta):
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _open(self, mode="r"):
+        dates = np.lib.format.open_memmap(self.dates_path, mode=mode)
+        navs = np.lib.format.open_memmap(self.navs_path, mode=mode)
+        return dates, navs
+
+    def _ensure_capacity(self, meta, days_needed, slots_needed):
+        if os.path.exists(self.navs_path):
+            dates, navs = self._open("r+")
+            if navs.shape[0] >= days_needed and navs.shape[1] >= slots_needed:
+                return dates, navs
+        else:
+            dates = navs = None
+
+        day_cap = max(INITIAL_DAYS, navs.shape[0] if navs is not None else 0)
+        slot_cap = max(INITIAL_SCHEMES, navs.shape[1] if navs is not None else 0)
+        while day_cap < days_needed:
+            day_cap *= 2
+        while slot_cap < slots_needed:
+            slot_cap *= 2
+
+        new_dates = np.lib.format.open_memmap(
+            f"{self.dates_path}.tmp", mode="w+", dtype=np.int32, shape=(day_cap,)
+        )
+        new_navs = np.lib.format.open_memmap(
+            f"{self.navs_path}.tmp",
+            mode="w+",
+            dtype=np.float32,
+            shape=(day_cap, slot_cap),
+        )
+        new_navs[:] = np.nan
+
+        if navs is not None:
+            days = meta["days"]
+            new_dates[:days] = dates[:days]
+            new_navs[:days, : navs.shape[1]] = navs[:days]
+
+        new_dates.flush()
+        new_navs.flush()
+        del new_dates, new_navs, dates, navs
+
+        os.replace(f"{self.dates_path}.tmp", self.dates_path)
+        os.replace(f"{self.navs_path}.tmp", self.navs_path)
+        return self._open("r+")
+
+    # ----------------------------
+    # Writes
+    # ----------------------------
+    def append_snapshot(self, codes, navs, dates):
+        """
+        Record one AMFI snapshot (parallel lists of scheme_code, NAV string
+        and AMFI date string). Re-recording a day overwrites it. Days older
+        than the newest stored day are only written if already present.
+        """
+        ordinals = [parse_amfi_date(d) for d in dates]
+        values = np.asarray([parse_nav(v) for v in navs], dtype=np.float32)
+
+        with self._locked():
+            meta = self._load_meta()
+            slot_of = {code: i for i, code in enumerate(meta["codes"])}
+            for code in codes:
+                if code not in slot_of:
+                    slot_of[code] = len(meta["codes"])
+                    meta["codes"].append(code)
+
+            days = meta["days"]
+            # A copy, not a memmap view: _ensure_capacity may replace the
+            # file, which fails on Windows while a mapping is still open
+            stored = (
+                np.array(self._open("r")[0][:days]) if days else np.empty(0, np.int32)
+            )
+            known = set(stored.tolist())
+            last = stored[-1] if days else -1
+            new_days = sorted(
+                {o for o in ordinals if o is not None and o not in known and o > last}
+            )
+
+            dates_mm, navs_mm = self._ensure_capacity(
+                meta, days + len(new_days), len(meta["codes"])
+            )
+            dates_mm[days : days + len(new_days)] = new_days
+            days += len(new_days)
+
+            day_dates = np.asarray(dates_mm[:days])
+            rows, slots, vals = [], [], []
+            for code, ordinal, value in zip(codes, ordinals, values):
+                if ordinal is None:
+                    continue
+                row = int(np.searchsorted(day_dates, ordinal))
+                if row < days and day_dates[row] == ordinal:
+                    rows.append(row)
+                    slots.append(slot_of[code])
+                    vals.append(value)
+
+            navs_mm[rows, slots] = vals
+            dates_mm.flush()
+            navs_mm.flush()
+
+            meta["days"] = days
+            self._save_meta(meta)
+
+    # ----------------------------
+    # Reads
+    # ----------------------------
+    def load(self):
+        """
+        Returns (dates[days], navs[days x schemes], codes) without copying.
+        """
+        meta = self._load_meta()
+        days, codes = meta["days"], meta["codes"]
+        if not days:
+            return np.empty(0, np.int32), np.empty((0, len(codes)), np.float32), codes
+
+        dates, navs = self._open("r")
+        return dates[:days], navs[:days, : len(codes)], codes
+
+    def metrics_for(self, codes):
+        """
+        Metric arrays aligned to `codes` (NaN where history is missing).
+        """
+        dates, navs, stored_codes = self.load()
+        metrics = compute_nav_metrics(dates, navs)
+
+        slot_of = {code: i for i, code in enumerate(stored_codes)}
+        slots = np.asarray([slot_of.get(code, -1) for code in codes], dtype=np.int64)
+        known = slots >= 0
+
+        aligned = {}
+        for field, values in metrics.items():
+            out = np.full(len(codes), np.nan)
+            out[known] = values[slots[known]]
+            aligned[field] = out
+        return aligned
+
+
+# ----------------------------
+# Vectorized metrics across all schemes
+# ----------------------------
+def forward_fill(navs):
+    """
+    Carry the last published NAV forward over holidays/missing days.
+    """
+    present = ~np.isnan(navs)
+    idx = np.where(present, np.arange(navs.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    filled = navs[idx, np.arange(navs.shape[1])]
+    # Leading gaps before a scheme's first NAV stay NaN
+    filled[~np.maximum.accumulate(present, axis=0)] = np.nan
+    return filled
+
+
+def _value_at(filled, dates, ordinal):
+    # Latest row on or before `ordinal`; NaN if history is too short
+    row = int(np.searchsorted(dates, ordinal, side="right")) - 1
+    if row < 0:
+        return np.full(filled.shape[1], np.nan)
+    return filled[row]
+
+
+def compute_nav_metrics(dates, navs):
+    """
+    1M return, 1Y/3Y CAGR, 1Y annualized volatility of daily log returns and
+    max drawdown for every scheme column at once.
+    """
+    schemes = navs.shape[1]
+    if len(dates) == 0 or schemes == 0:
+        return {field: np.full(schemes, np.nan) for field in METRIC_FIELDS}
+
+    navs = np.asarray(navs, dtype=np.float64)
+    filled = forward_fill(navs)
+    latest = filled[-1]
+    today = int(dates[-1])
+
+    # Schemes without enough history legitimately produce NaN
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return_1m = latest / _value_at(filled, dates, today - WINDOW_1M) - 1
+        cagr_1y = latest / _value_at(filled, dates, today - WINDOW_1Y) - 1
+        cagr_3y = (latest / _value_at(filled, dates, today - WINDOW_3Y)) ** (
+            WINDOW_1Y / WINDOW_3Y
+        ) - 1
+
+        year = dates > today - WINDOW_1Y
+        log_returns = np.diff(np.log(navs[year]), axis=0)
+        counts = np.sum(~np.isnan(log_returns), axis=0)
+        volatility = np.where(
+            counts >= 2,
+            np.nanstd(log_returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR),
+            np.nan,
+        )
+
+        peaks = np.fmax.accumulate(filled, axis=0)
+        max_drawdown = np.nanmin(filled / peaks - 1, axis=0)
+
+    return {
+        "return_1m": return_1m,
+        "cagr_1y": cagr_1y,
+        "cagr_3y": cagr_3y,
+        "volatility_1y": volatility,
+        "max_drawdown": max_drawdown,
+    }
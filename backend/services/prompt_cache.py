@@ -0,0 +1,140 @@
+# services/prompt_cache.py
+# Prompt-keyed cache for LLM responses (in-memory LRU + optional SQLite)
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+PROMPT_CACHE_SIZE = int(os.getenv("GEMINI_CACHE_SIZE", "1024"))
+# Set to a file path to share cached responses between uvicorn workers
+PROMPT_CACHE_DB = os.getenv("GEMINI_CACHE_DB")
+
+_whitespace = re.compile(r"\s+")
+
+
+def prompt_key(model_name: str, prompt: str) -> str:
+    # Indentation / blank-line differences must not defeat the cache
+    normalized = _whitespace.sub(" ", prompt).strip()
+    return hashlib.sha256(f"{model_name}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class SqlitePromptStore:
+    """
+    Shared second-level store. WAL mode lets several worker processes read
+    while one writes.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prompt_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM prompt_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prompt_cache VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            # Opportunistic cleanup keeps the file from growing forever
+            self._conn.execute(
+                "DELETE FROM prompt_cache WHERE expires_at <= ?", (time.time(),)
+            )
+            self._conn.commit()
+
+
+class PromptCache:
+    """
+    LRU of prompt-key -> (response, expires_at), each entry with its own TTL.
+    Misses fall through to the shared store when one is configured.
+    """
+
+    def __init__(self, max_entries=PROMPT_CACHE_SIZE, store=None):
+        self.max_entries = max_entries
+        self.store = store
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+
+        row = self.store.get(key) if self.store else None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._put(key, row[0], row[1])
+            return row[0]
+
+    def set(self, key, value, ttl):
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._put(key, value, expires_at)
+        if self.store:
+            self.store.set(key, value, expires_at)
+
+    def _put(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "sharedHits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": (
+                    round((self.hits + self.shared_hits) / lookups, 4)
+                    if lookups
+                    else 0.0
+                ),
+                "shared": self.store is not None,
+            }
+
+
+def create_prompt_cache():
+    store = SqlitePromptStore(PROMPT_CACHE_DB) if PROMPT_CACHE_DB else None
+    return PromptCache(store=store)
@@ -0,0 +1,149 @@
+# services/request_loader.py
+# Request-scoped memoization of per-user Firestore reads
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Independent reads of one request run side by side on this pool
+READ_CONCURRENCY = 16
+
+_read_pool = ThreadPoolExecutor(
+    max_workers=READ_CONCURRENCY, thread_name_prefix="firestore-read"
+)
+_pool_thread = threading.local()
+
+_current_loader = contextvars.ContextVar("user_data_loader", default=None)
+
+
+class UserDataLoader:
+    """
+    Memo of reads for one request, keyed by (user_id, path) where path names
+    the data ("profile", "dreams", ("transactions", start, end), ...).
+    Callers asking for a key that is already being read wait for that read
+    instead of issuing their own. Results are shared: treat them as read-only.
+    Sync reads share Futures across threads; async reads share Tasks on the
+    event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._tasks = {}
+        self.reads = 0
+        self.hits = 0
+
+    def load(self, user_id, path, fetch):
+        key = (user_id, path)
+
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+                self.reads += 1
+            else:
+                self.hits += 1
+
+        if owner:
+            try:
+                future.set_result(fetch())
+            except Exception as e:
+                # Failed reads are not memoized, the next caller retries
+                with self._lock:
+                    self._futures.pop(key, None)
+                future.set_exception(e)
+
+        return future.result()
+
+    async def aload(self, user_id, path, fetch):
+        key = (user_id, path)
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fetch())
+            self.reads += 1
+        else:
+            self.hits += 1
+
+        try:
+            return await task
+        except Exception:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+            raise
+
+    def invalidate(self, user_id, kind):
+        """
+        Drop every memoized path of `kind` for the user (after a write).
+        """
+        with self._lock:
+            for memo in (self._futures, self._tasks):
+                for key in list(memo):
+                    path = key[1]
+                    name = path[0] if isinstance(path, tuple) else path
+                    if key[0] == user_id and name == kind:
+                        del memo[key]
+
+
+def start_request_scope():
+    return _current_loader.set(UserDataLoader())
+
+
+def end_request_scope(token):
+    _current_loader.reset(token)
+
+
+def current_loader():
+    return _current_loader.get()
+
+
+def load(user_id, path, fetch):
+    """
+    fetch() memoized for the current request; called directly outside one.
+    """
+    loader = _current_loader.get()
+    if loader is None:
+        return fetch()
+    return loader.load(user_id, path, fetch)
+
+
+async def aload(user_id, path, fetch):
+    """
+    Async twin of load(): `fetch` is a zero-argument coroutine function.
+    """
+    loader = _current_loader.get()
+    if loader is None:
+        return await fetch()
+    return await loader.aload(user_id, path, fetch)
+
+
+def invalidate(user_id, kind):
+    loader = _current_loader.get()
+    if loader is not None:
+        loader.invalidate(user_id, kind)
+
+
+def _run_in_pool(ctx, fn):
+    _pool_thread.active = True
+    try:
+        return ctx.run(fn)
+    finally:
+        _pool_thread.active = False
+
+
+def load_many(*fetches):
+    """
+    Run independent zero-argument reads concurrently, results in order.
+    Each read sees the caller's request scope. Nested calls from a pool
+    thread run inline so the pool can never wait on itself.
+    """
+    if len(fetches) < 2 or getattr(_pool_thread, "active", False):
+        return [fetch() for fetch in fetches]
+
+    futures = [
+        _read_pool.submit(_run_in_pool, contextvars.copy_context(), fetch)
+        for fetch in fetches
+    ]
+    return [future.result() for future in futures]
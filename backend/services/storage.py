@@ -0,0 +1,84 @@
+# services/storage.py
+# Storage backend behind firestore_service and the agents:
+#   STORAGE_BACKEND=firestore (default)  Firebase Admin / Cloud Firestore
+#   STORAGE_BACKEND=memory               in-process store (services/memory_store.py)
+# With memory, STORAGE_DB=<file> persists the store to SQLite across restarts.
+# memory is single-process only (one uvicorn worker): each process holds its
+# own copy and reads STORAGE_DB only at startup.
+
+import os
+import threading
+
+from services import memory_store
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore")
+STORAGE_DB = os.getenv("STORAGE_DB")
+
+if STORAGE_BACKEND not in ("firestore", "memory"):
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _memory_store():
+    # One store per process, shared by the sync and async clients
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = memory_store.MemoryStore(STORAGE_DB)
+        return _store
+
+
+def _init_firebase():
+    import firebase_admin
+    from firebase_admin import credentials
+
+    # Initialize Firebase Admin only once
+    if not firebase_admin._apps:
+        cred = credentials.Certificate("firebase-key.json")
+        firebase_admin.initialize_app(cred)
+
+
+def get_client():
+    if STORAGE_BACKEND == "memory":
+        return memory_store.Client(_memory_store())
+
+    from firebase_admin import firestore
+
+    _init_firebase()
+    return firestore.client()
+
+
+def get_async_client():
+    if STORAGE_BACKEND == "memory":
+        return memory_store.AsyncClient(_memory_store())
+
+    from firebase_admin import firestore_async
+
+    _init_firebase()
+    return firestore_async.client()
+
+
+def transactional(fn):
+    """
+    firestore.transactional for whichever backend is configured.
+    """
+    if STORAGE_BACKEND == "memory":
+        return memory_store.transactional(fn)
+
+    from firebase_admin import firestore
+
+    return firestore.transactional(fn)
+
+
+def async_transactional(fn):
+    """
+    firestore.async_transactional for whichever backend is configured.
+    """
+    if STORAGE_BACKEND == "memory":
+        return memory_store.async_transactional(fn)
+
+    from firebase_admin import firestore_async
+
+    return firestore_async.async_transactional(fn)
@@ -0,0 +1,139 @@
+# services/transaction_frame.py
+# Column arrays over a user's daily logs + the statistics agents derive from them
+
+import numpy as np
+
+
+def _coerce(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def to_float(values):
+    """
+    Vectorized float coercion: numbers and numeric strings parse in one
+    NumPy call; only a batch containing junk ("", "abc") falls back to
+    per-value parsing. Missing / unparsable values become 0.
+    """
+    try:
+        arr = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        arr = np.asarray([_coerce(v) for v in values], dtype=np.float64)
+    return np.nan_to_num(arr, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+class TransactionFrame:
+    """
+    One row per daily log, sorted by date:
+        dates       "YYYY-MM-DD" (the transaction doc IDs)
+        income      float64
+        hours       float64
+        expenses    float64 [rows x categories], 0 where a category is absent
+        spent       float64, expenses summed per row
+    Windows (month, last N days) are narrowed by the Firestore range query
+    that loads the frame.
+    """
+
+    def __init__(self, dates, income, hours, categories, expenses):
+        self.dates = dates
+        self.income = income
+        self.hours = hours
+        self.categories = categories
+        self.expenses = expenses
+        self.spent = expenses.sum(axis=1)
+
+    @classmethod
+    def from_logs(cls, logs):
+        rows = sorted(
+            (log for log in logs if log.get("date")), key=lambda log: log["date"]
+        )
+        categories = sorted(
+            {cat for log in rows for cat in (log.get("expenses") or {})}
+        )
+        column = {cat: i for i, cat in enumerate(categories)}
+
+        # Flatten every expense value so they are coerced in one pass
+        row_ids, col_ids, raw = [], [], []
+        for i, log in enumerate(rows):
+            for cat, amt in (log.get("expenses") or {}).items():
+                row_ids.append(i)
+                col_ids.append(column[cat])
+                raw.append(amt)
+
+        expenses = np.zeros((len(rows), len(categories)))
+        if raw:
+            np.add.at(expenses, (row_ids, col_ids), to_float(raw))
+
+        return cls(
+            np.asarray([log["date"] for log in rows], dtype="U10"),
+            to_float([log.get("income") for log in rows]),
+            to_float([log.get("hoursWorked") for log in rows]),
+            categories,
+            expenses,
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+    # ----------------------------
+    # Statistics
+    # ----------------------------
+    def total_income(self):
+        return float(self.income.sum())
+
+    def total_spent(self):
+        return float(self.spent.sum())
+
+    def avg_daily_income(self):
+        return float(self.income.mean()) if len(self) else 0.0
+
+    def avg_daily_spend(self):
+        return float(self.spent.mean()) if len(self) else 0.0
+
+    def category_totals(self):
+        totals = self.expenses.sum(axis=0)
+        return {cat: float(total) for cat, total in zip(self.categories, totals)}
+
+    def hourly_rate(self):
+        """
+        Income per hour over the days with hours logged; None without any.
+        """
+        worked = self.hours > 0
+        total_hours = self.hours[worked].sum()
+        if total_hours == 0:
+            return None
+        return float(self.income[worked].sum() / total_hours)
+
+    def by_month(self):
+        """
+        "YYYY-MM" -> {"income", "expenses", "days"}
+        """
+        if not len(self):
+            return {}
+
+        months, group = np.unique(self.dates.astype("U7"), return_inverse=True)
+        income = np.bincount(group, weights=self.income)
+        spent = np.bincount(group, weights=self.spent)
+        days = np.bincount(group)
+
+        return {
+            month: {
+                "income": round(float(income[i]), 2),
+                "expenses": round(float(spent[i]), 2),
+                "days": int(days[i]),
+            }
+            for i, month in enumerate(months.tolist())
+        }
+
+    def daily(self):
+        """
+        Per-day rows, oldest first.
+        """
+        return [
+            {"date": date, "income": income, "spent": spent}
+            for date, income, spent in zip(
+                self.dates.tolist(), self.income.tolist(), self.spent.tolist()
+            )
+        ]
@@ -33,29 +33,54 @@ const ChatBot = ({ userId }) => {
     setIsLoading(true);
 
     try {
-      const response = await fetch(`http://localhost:8000/ai/chat/${userId}`, {
+      const response = await fetch(`http://localhost:8000/ai/chat/${userId}/stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ message: userMessage })
       });
 
-      const data = await response.json();
-      
-      // Format backend response for human readability
-      let botText = '';
-      if (typeof data === 'string') {
-        botText = data;
-      } else if (data.reply) {
-        botText = data.reply.replace(/\n/g, '<br/>');
-      } else if (data.message) {
-        botText = data.message.replace(/\n/g, '<br/>');
-      } else if (data.advice) {
-        botText = data.advice.replace(/\n/g, '<br/>');
-      } else {
-        botText = JSON.stringify(data);
+      if (!response.ok || !response.body) {
+        throw new Error(`Chat stream failed: ${response.status}`);
       }
 
-      setMessages(prev => [...prev, { role: 'model', text: botText }]);
+      // Bot bubble is added on the first token, then filled in as tokens arrive
+      let botText = '';
+      let bubbleAdded = false;
+      const showText = (text) => {
+        const message = { role: 'model', text: text.replace(/\n/g, '<br/>') };
+        const replace = bubbleAdded;
+        bubbleAdded = true;
+        setMessages(prev => (replace ? [...prev.slice(0, -1), message] : [...prev, message]));
+      };
+
+      // Server-Sent Events: "event: <name>\ndata: <json>\n\n"
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = raw.match(/^data: (.*)$/m)?.[1];
+          if (!data) continue;
+
+          const payload = JSON.parse(data);
+          if (event === 'token') {
+            setIsLoading(false);
+            botText += payload.text;
+            showText(botText);
+          } else if (event === 'done') {
+            showText(payload.reply || botText);
+          }
+        }
+      }
     } catch (error) {
       console.error("Chat error:", error);
       setMessages(prev => [...prev, { role: 'model', text: "I'm having trouble connecting to the market server right now. Please try again later." }]);
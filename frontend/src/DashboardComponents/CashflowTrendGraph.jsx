@@ -1,6 +1,4 @@
 import React, { useEffect, useState } from "react";
-import { db } from "../firebase";
-import { collection, getDocs } from "firebase/firestore";
 import { Activity, TrendingUp, CalendarDays, Filter } from "lucide-react";
 import {
   AreaChart,
@@ -51,47 +49,22 @@ export default function CashflowTrendGraph({ user }) {
   async function load() {
     setLoading(true);
     try {
-      const ref = collection(db, "users", user.uid, "transactions");
-      const snap = await getDocs(ref);
-
-      let arr = [];
-      let total = 0;
-
-      snap.forEach((doc) => {
-        const d = doc.data();
-        const spent = Object.values(d.expenses || {}).reduce(
-          (a, b) => a + Number(b || 0),
-          0
-        );
-
-        total += spent;
-
-        // Date Parsing & Formatting
-        let displayDate = doc.id;
-        let rawDate = new Date(); // Default fallback
-
-        if (d.date) {
-          // Parse YYYY-MM-DD
-          const [year, month, day] = d.date.split("-").map(Number);
-          rawDate = new Date(year, month - 1, day);
-          
-          // Format to "12 Oct"
-          const months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
-          displayDate = `${day} ${months[month - 1]}`;
-        }
-
-        arr.push({
-          date: displayDate,
-          rawDate: rawDate, // We keep this for sorting
-          spent,
-        });
+      // Daily series for the last 90 days (ETag-cached)
+      const res = await fetch(
+        `http://localhost:8000/summary/${user.uid}/trend?days=90`
+      );
+      if (!res.ok) throw new Error(`Trend failed (${res.status})`);
+      const { series, totalSpent } = await res.json();
+
+      // Format "YYYY-MM-DD" to "12 Oct" (already oldest to newest)
+      const months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
+      const arr = series.map((point) => {
+        const [, month, day] = point.date.split("-").map(Number);
+        return { date: `${day} ${months[month - 1]}`, spent: point.spent };
       });
 
-      // Sort Chronologically (Oldest to Newest)
-      arr.sort((a, b) => a.rawDate - b.rawDate);
-
       setSeries(arr);
-      setTotalSpent(total);
+      setTotalSpent(totalSpent);
     } catch (err) {
       console.error("Error loading graph data:", err);
     } finally {
@@ -32,7 +32,7 @@ const ProgressBar = ({ saved, goal }) => {
   );
 };
 
-export default function DreamsCard({ user }) {
+export default function DreamsCard({ user, section }) {
   const [dreams, setDreams] = useState([]);
   const [aiPlan, setAiPlan] = useState(null);
   const [showModal, setShowModal] = useState(false);
@@ -50,10 +50,23 @@ export default function DreamsCard({ user }) {
   useEffect(() => {
     if (!user) return;
     setLoading(true);
-    // Load dreams first, then plan
-    loadDreams().then(() => loadAIPlan()).finally(() => setLoading(false));
+    loadDreams().finally(() => setLoading(false));
   }, [user]);
 
+  useEffect(() => {
+    if (!user) return;
+    // On the dashboard the plan arrives with the /dashboard stream (null =
+    // still running); without a stream, or if it ended without the plan,
+    // fetch it here
+    if (section === undefined) {
+      loadAIPlan();
+    } else if (section && !section.ok) {
+      console.log("AI Plan load failed", section.error);
+    } else if (section?.data) {
+      setAiPlan(section.data);
+    }
+  }, [user, section]);
+
   const loadDreams = async () => {
     try {
       const res = await axios.get(`${API}/dreams/${user.uid}`);
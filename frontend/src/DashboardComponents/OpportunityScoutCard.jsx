@@ -34,13 +34,31 @@ const RadarLoader = () => (
   </div>
 );
 
-export default function OpportunityScoutCard({ user }) {
+// Replaces the radar when the scout request fails
+const ErrorState = ({ message }) => (
+  <div className="p-6 bg-white rounded-2xl shadow-lg border border-red-100 flex flex-col items-center justify-center text-center">
+    <Info className="w-6 h-6 text-red-500 mb-2" />
+    <h3 className="text-gray-900 font-semibold">Couldn't scout opportunities</h3>
+    <p className="text-gray-500 text-sm mt-1">{message}</p>
+  </div>
+);
+
+export default function OpportunityScoutCard({ user, section }) {
   const [data, setData] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [error, setError] = useState(null);
 
   useEffect(() => {
+    // Fed by the /dashboard stream (null = section still running)
+    if (section !== undefined) {
+      setData(section?.data ?? null);
+      setError(section && !section.ok ? section.error || "Request failed" : null);
+      setLoading(!section);
+      return;
+    }
     if (!user) return;
     setLoading(true);
+    setError(null);
 
     const fetchData = async (lat, lon) => {
       try {
@@ -49,10 +67,12 @@ export default function OpportunityScoutCard({ user }) {
           url += `?lat=${lat}&lon=${lon}`;
         }
         const res = await fetch(url);
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
         const json = await res.json();
         setData(json);
       } catch (err) {
         console.error("Opportunity Fetch Error", err);
+        setError(err.message);
       } finally {
         setLoading(false);
       }
@@ -68,8 +88,9 @@ export default function OpportunityScoutCard({ user }) {
       () => fetchData(), // Fallback if blocked
       { timeout: 5000 }
     );
-  }, [user]);
+  }, [user, section]);
 
+  if (error) return <ErrorState message={error} />;
   if (loading || !data) return <RadarLoader />;
 
   // Destructure for cleaner access
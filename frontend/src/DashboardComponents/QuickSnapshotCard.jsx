@@ -1,6 +1,4 @@
 import React, { useEffect, useState } from "react";
-import { db } from "../firebase";
-import { collection, getDocs } from "firebase/firestore";
 import { 
   Target, 
   Zap, 
@@ -47,43 +45,22 @@ export default function QuickSnapshotCard({ profile, user }) {
 
     const load = async () => {
       try {
-        const userId = user.uid;
+        // Per-month totals from the user's aggregate (ETag-cached)
+        const res = await fetch(
+          `http://localhost:8000/summary/${user.uid}/months`
+        );
+        if (!res.ok) throw new Error(`Monthly totals failed (${res.status})`);
+        const { months } = await res.json();
+
         const now = new Date();
-        const currentMonth = now.getMonth();
-        const currentYear = now.getFullYear();
-
-        const transRef = collection(db, "users", userId, "transactions");
-        const docsSnap = await getDocs(transRef);
-
-        let totalIncome = 0;
-        let totalExpenses = 0;
-        let daysLogged = 0;
-
-        docsSnap.forEach((docSnap) => {
-          const data = docSnap.data();
-          const dateKey = docSnap.id; // YYYY-MM-DD
-          const [year, month, day] = dateKey.split("-").map(Number);
-          const d = new Date(year, month - 1, day);
-
-          if (isNaN(d.getTime())) return;
-
-          if (d.getFullYear() === currentYear && d.getMonth() === currentMonth) {
-            daysLogged++;
-            const income = Number(data.income) || 0;
-            const expenses = Object.values(data.expenses || {}).reduce(
-              (sum, val) => sum + (Number(val) || 0),
-              0
-            );
-            totalIncome += income;
-            totalExpenses += expenses;
-          }
-        });
+        const monthKey = `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, "0")}`;
+        const month = months[monthKey] || { income: 0, expenses: 0, days: 0 };
 
         setLive({
-          income: totalIncome,
-          expenses: totalExpenses,
-          balance: totalIncome - totalExpenses,
-          daysLogged,
+          income: month.income,
+          expenses: month.expenses,
+          balance: month.income - month.expenses,
+          daysLogged: month.days,
         });
       } catch (err) {
         console.error("Snapshot Load Error:", err);
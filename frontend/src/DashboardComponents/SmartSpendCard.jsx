@@ -35,25 +35,48 @@ const SkeletonLoader = () => (
   </div>
 );
 
-export default function SmartSpendGuardianCard({ user }) {
+// Shown when the guardian fails to load
+const ErrorState = ({ message }) => (
+  <div className="p-6 bg-white rounded-2xl shadow-lg border border-red-100 flex flex-col items-center justify-center text-center">
+    <AlertTriangle className="w-6 h-6 text-red-500 mb-2" />
+    <h3 className="text-gray-900 font-semibold">Couldn't load Smart Spend Guardian</h3>
+    <p className="text-gray-500 text-sm mt-1">{message}</p>
+  </div>
+);
+
+export default function SmartSpendGuardianCard({ user, section }) {
   const [data, setData] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [error, setError] = useState(null);
 
   useEffect(() => {
+    // Fed by the /dashboard stream (null = section still running)
+    if (section !== undefined) {
+      setData(section?.data ?? null);
+      setError(section && !section.ok ? section.error || "Request failed" : null);
+      setLoading(!section);
+      return;
+    }
     if (!user) return;
     setLoading(true);
+    setError(null);
     fetch(`http://localhost:8000/ai/smart-guardian/${user.uid}`)
-      .then((r) => r.json())
+      .then((r) => {
+        if (!r.ok) throw new Error(`HTTP ${r.status}`);
+        return r.json();
+      })
       .then((res) => {
         setData(res);
         setLoading(false);
       })
       .catch((err) => {
         console.error("SmartSpend API error:", err);
+        setError(err.message);
         setLoading(false);
       });
-  }, [user]);
+  }, [user, section]);
 
+  if (error) return <ErrorState message={error} />;
   if (loading || !data) return <SkeletonLoader />;
 
   // Logic to determine status colors
@@ -1,6 +1,4 @@
 import React, { useEffect, useState } from "react";
-import { db } from "../firebase";
-import { collection, getDocs } from "firebase/firestore";
 import { PieChart as PieIcon, Layers, CreditCard } from "lucide-react";
 import {
   PieChart,
@@ -66,32 +64,15 @@ export default function SpendingPieChart({ user }) {
   async function load() {
     setLoading(true);
     try {
-      const ref = collection(db, "users", user.uid, "transactions");
-      const snap = await getDocs(ref);
+      // Category totals from the user's aggregate (ETag-cached)
+      const res = await fetch(
+        `http://localhost:8000/summary/${user.uid}/categories`
+      );
+      if (!res.ok) throw new Error(`Category breakdown failed (${res.status})`);
+      const { total, categories } = await res.json();
 
-      let totals = {};
-      let totalSum = 0;
-
-      snap.forEach((doc) => {
-        const ex = doc.data().expenses || {};
-        for (let cat in ex) {
-          const amount = Number(ex[cat] || 0);
-          totals[cat] = (totals[cat] || 0) + amount;
-          totalSum += amount;
-        }
-      });
-
-      // Convert to chart format and add percentages
-      const formatted = Object.entries(totals)
-        .map(([name, value]) => ({
-          name,
-          value,
-          percentage: totalSum === 0 ? 0 : ((value / totalSum) * 100).toFixed(1),
-        }))
-        .sort((a, b) => b.value - a.value); // Sort highest spend first
-
-      setData(formatted);
-      setTotalSpend(totalSum);
+      setData(categories);
+      setTotalSpend(total);
     } catch (error) {
       console.error("Error loading chart data", error);
     } finally {
@@ -3,7 +3,7 @@ import DatePicker from "react-datepicker";
 import "react-datepicker/dist/react-datepicker.css";
 
 import { db } from "../firebase"; 
-import { doc, getDoc, setDoc } from "firebase/firestore";
+import { doc, getDoc } from "firebase/firestore";
 import { 
   Calendar as CalendarIcon, 
   Edit3, 
@@ -123,12 +123,19 @@ export default function TodayLogCard({ user }) {
     };
     
     try {
-      await setDoc(
-        doc(db, "users", user.uid, "transactions", dateKey),
-        cleaned,
-        { merge: true }
+      // Saved through the backend so the user's summary totals stay in sync
+      const res = await fetch(
+        `http://localhost:8000/transactions/${user.uid}/${dateKey}`,
+        {
+          method: "PUT",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify(cleaned),
+        }
       );
-      setLog(cleaned);
+      if (!res.ok) throw new Error(`Save failed (${res.status})`);
+
+      const data = await res.json();
+      setLog(data.log);
       setEditing(false);
     } catch (error) {
       console.error("Error saving:", error);
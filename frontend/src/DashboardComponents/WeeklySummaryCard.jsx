@@ -1,6 +1,4 @@
 import React, { useEffect, useState } from "react";
-import { db } from "../firebase";
-import { collection, getDocs } from "firebase/firestore";
 import { 
   TrendingUp, 
   Calendar, 
@@ -36,67 +34,12 @@ export default function WeeklySummaryCard({ user }) {
 
     const loadWeeklySummary = async () => {
       try {
-        const userId = user.uid;
-        const today = new Date();
-        const startDate = new Date();
-        startDate.setDate(today.getDate() - 7);
-
-        const transRef = collection(db, "users", userId, "transactions");
-        const docsSnap = await getDocs(transRef);
-
-        let totalIncome = 0;
-        let totalExpenses = 0;
-        let totalHours = 0;
-        let bestDay = null;
-        let bestDayIncome = 0;
-        let daily = [];
-
-        docsSnap.forEach((docSnap) => {
-          const data = docSnap.data();
-          const dateKey = docSnap.id;
-          const logDate = new Date(dateKey);
-          
-          if (isNaN(logDate.getTime())) return;
-          if (logDate < startDate) return; // Only last 7 days
-
-          const income = Number(data.income || 0);
-          const hours = Number(data.hoursWorked || 0);
-          const expenses = Object.values(data.expenses || {}).reduce(
-            (sum, v) => sum + (Number(v) || 0), 0
-          );
-
-          totalIncome += income;
-          totalExpenses += expenses;
-          totalHours += hours;
-
-          if (income > bestDayIncome) {
-            bestDayIncome = income;
-            bestDay = dateKey;
-          }
-
-          daily.push({
-            date: dateKey,
-            income,
-            expenses,
-            profit: income - expenses
-          });
-        });
-
-        // Sort: Newest first for the list usually looks better, but Chronological is good for "Summary"
-        daily.sort((a, b) => new Date(b.date) - new Date(a.date));
-
-        const efficiency = totalHours > 0 ? Number((totalIncome / totalHours).toFixed(0)) : 0;
-
-        setSummary({
-          totalIncome,
-          totalExpenses,
-          netProfit: totalIncome - totalExpenses,
-          bestDay: bestDay,
-          bestDayIncome,
-          efficiencyPerHour: efficiency,
-          totalHours,
-          daily,
-        });
+        // Aggregated server-side; the browser revalidates with the ETag
+        const res = await fetch(
+          `http://localhost:8000/summary/${user.uid}/weekly`
+        );
+        if (!res.ok) throw new Error(`Weekly summary failed (${res.status})`);
+        setSummary(await res.json());
       } catch (err) {
         console.error("Error loading summary", err);
       } finally {
@@ -23,6 +23,10 @@ export default function Dashboard() {
   const [user, setUser] = useState(null);
   const [profile, setProfile] = useState(null);
   const [loadingProfile, setLoadingProfile] = useState(true);
+  // Agent cards, filled in as /dashboard streams each section
+  const [sections, setSections] = useState({});
+  // Once the stream ends (or fails), cards it did not fill fetch their own
+  const [streamEnded, setStreamEnded] = useState(false);
 
   // -------------------------------
   // AUTH + PROFILE
@@ -50,6 +54,70 @@ export default function Dashboard() {
     return () => unsub();
   }, []);
 
+  // -------------------------------
+  // AGENT CARDS (one streamed request)
+  // -------------------------------
+  useEffect(() => {
+    if (!user) return;
+    let cancelled = false;
+    setSections({});
+    setStreamEnded(false);
+
+    const load = async (lat, lon) => {
+      let url = `http://localhost:8000/dashboard/${user.uid}`;
+      if (lat && lon) {
+        url += `?lat=${lat}&lon=${lon}`;
+      }
+
+      try {
+        const res = await fetch(url);
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done || cancelled) break;
+
+          // NDJSON: one finished section per line
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split("\n");
+          buffer = lines.pop();
+
+          for (const line of lines) {
+            if (!line.trim()) continue;
+            const section = JSON.parse(line);
+            if (section.section === "done") continue;
+            setSections((prev) => ({ ...prev, [section.section]: section }));
+          }
+        }
+      } catch (err) {
+        console.error("Dashboard stream error", err);
+      } finally {
+        if (!cancelled) setStreamEnded(true);
+      }
+    };
+
+    if (!navigator.geolocation) {
+      load();
+    } else {
+      navigator.geolocation.getCurrentPosition(
+        (pos) => load(pos.coords.latitude, pos.coords.longitude),
+        () => load(), // Fallback if blocked
+        { timeout: 5000 }
+      );
+    }
+
+    return () => {
+      cancelled = true;
+    };
+  }, [user]);
+
+  // Streamed section; null while it may still arrive, undefined once the
+  // stream is over without it (the card then calls its own endpoint)
+  const sectionFor = (name) => sections[name] ?? (streamEnded ? undefined : null);
+
   // Loading Screen
   if (loadingProfile) {
     return (
@@ -129,7 +197,7 @@ export default function Dashboard() {
           
           {/* Opportunity Scout (Side) */}
           <div className="lg:col-span-5 xl:col-span-4 flex flex-col h-full">
-            <OpportunityScoutCard user={user} />
+            <OpportunityScoutCard user={user} section={sectionFor("opportunity")} />
           </div>
         </section>
 
@@ -142,11 +210,11 @@ export default function Dashboard() {
           
           {/* Financial Guardians */}
           <div className="space-y-6">
-             <SmartSpendGuardianCard user={user} />
+             <SmartSpendGuardianCard user={user} section={sectionFor("smartSpend")} />
           </div>
           
           <div className="space-y-6">
-             <CashflowCard user={user} />
+             <CashflowCard user={user} section={sectionFor("cashflow")} />
           </div>
         </section>
 
@@ -166,7 +234,7 @@ export default function Dashboard() {
              <WeeklySummaryCard user={user} />
           </div>
           <div className="h-full">
-             <DreamsCard user={user} />
+             <DreamsCard user={user} section={sectionFor("dreams")} />
           </div>
         </section>
 